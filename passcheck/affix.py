@@ -0,0 +1,265 @@
+"""Expansion of hunspell dictionaries into wordlists.
+
+Words of a .dic file are expanded with prefix and suffix rules of its .aff file into all their forms, so that they can
+be matched with the same lookups as other wordlists, instead of asking hunspell to spell each fragment.
+"""
+
+import collections.abc
+import os.path
+import re
+
+from passcheck import cache
+from passcheck import wordlist
+
+
+# Directives changing how words are matched in ways expansion can't reproduce.
+UNSUPPORTED = {'CIRCUMFIX', 'COMPLEXPREFIXES', 'FULLSTRIP', 'ICONV', 'IGNORE', 'OCONV'}
+
+
+class Unsupported(ValueError):
+    """Affix file uses rules which can't be expanded, the dictionary needs hunspell itself."""
+
+
+def get_condition(condition):
+    """Translate condition of an affix to a regular expression, only . and [] groups have a special meaning in it."""
+    regex = ''
+    for part in re.findall(r'\[\^?[^\]]*\]|.', condition):
+        if part == '.':
+            regex += part
+        elif part.startswith('[^'):
+            regex += '[^' + re.escape(part[2:-1]) + ']'
+        elif part.startswith('['):
+            regex += '[' + re.escape(part[1:-1]) + ']'
+        else:
+            regex += re.escape(part)
+    return regex
+
+
+class Affix(object):
+
+    def __init__(self, kind, flag, cross, strip, add, flags, condition):
+        self.kind = kind
+        self.flag = flag
+        self.cross = cross
+        self.strip = strip
+        self.add = add
+        # Continuation flags, affixes which can be applied to forms made with this one.
+        self.flags = flags
+        if kind == 'PFX':
+            self.condition = re.compile('^' + get_condition(condition))
+        else:
+            self.condition = re.compile(get_condition(condition) + '$')
+
+    def apply(self, word):
+        """Return word with this affix applied, None if affix does not apply to word."""
+        if not self.condition.search(word):
+            return None
+        if self.kind == 'PFX':
+            if not word.startswith(self.strip):
+                return None
+            return self.add + word[len(self.strip):]
+        if not word.endswith(self.strip):
+            return None
+        return word[:len(word) - len(self.strip)] + self.add
+
+
+class Affixes(object):
+    """Rules of an .aff file."""
+
+    def __init__(self, path):
+        self.encoding = 'utf-8'
+        self.flag = 'short'
+        self.aliases = []
+        self.affixes = {}
+        self.needaffix = None
+        self.forbidden = None
+        self.onlyincompound = None
+
+        with open(path, 'rb') as f:
+            lines = f.read().splitlines()
+
+        # Encoding is set before any rules, so it is found first.
+        for line in lines:
+            fields = line.split()
+            if len(fields) > 1 and fields[0] == b'SET':
+                self.encoding = fields[1].decode('ascii')
+                break
+
+        pending = {}
+        for line in lines:
+            fields = line.decode(self.encoding, errors='replace').split()
+            if not fields or fields[0].startswith('#'):
+                continue
+            name = fields[0]
+            if name in UNSUPPORTED:
+                raise Unsupported("%s: %s is not supported." % (path, name))
+            elif name == 'FLAG':
+                self.flag = fields[1]
+            elif name == 'AF' and len(fields) > 1:
+                # First AF line gives the number of aliases, which are numbered from 1 in order.
+                if ('AF', None) in pending:
+                    self.aliases.append(self.parse_flags(fields[1]))
+                pending['AF', None] = True
+            elif name == 'NEEDAFFIX':
+                self.needaffix = fields[1]
+            elif name == 'FORBIDDENWORD':
+                self.forbidden = fields[1]
+            elif name == 'ONLYINCOMPOUND':
+                self.onlyincompound = fields[1]
+            elif name in ('PFX', 'SFX') and len(fields) >= 4:
+                flag = fields[1]
+                if (name, flag) not in pending:
+                    # Header line: PFX flag cross_product count
+                    pending[name, flag] = fields[2] == 'Y'
+                    continue
+                strip = '' if fields[2] == '0' else fields[2]
+                add, _, flags = fields[3].partition('/')
+                add = '' if add == '0' else add
+                condition = fields[4] if len(fields) > 4 else '.'
+                affix = Affix(name, flag, pending[name, flag], strip, add, self.get_flags(flags), condition)
+                self.affixes.setdefault(flag, []).append(affix)
+
+    def parse_flags(self, flags):
+        if self.flag == 'long':
+            return [flags[i:i + 2] for i in range(0, len(flags), 2)]
+        elif self.flag == 'num':
+            return [f for f in flags.split(',') if f]
+        else:
+            return list(flags)
+
+    def get_flags(self, flags):
+        """Return flags given in a .dic file or after an affix, which can be a number of an AF alias."""
+        if self.aliases and flags.isdigit():
+            return self.aliases[int(flags) - 1]
+        return self.parse_flags(flags)
+
+    def expand(self, word, flags):
+        """Yield all forms of word with given flags."""
+        if self.forbidden in flags or self.onlyincompound in flags:
+            return
+        if self.needaffix not in flags:
+            yield word
+        suffixed = []
+        for flag in flags:
+            for sfx in self.affixes.get(flag, ()):
+                if sfx.kind != 'SFX':
+                    continue
+                form = sfx.apply(word)
+                if form is None:
+                    continue
+                if self.needaffix not in sfx.flags:
+                    yield form
+                suffixed.append((form, sfx))
+                # Hunspell allows a second suffix, given by continuation flags of the first.
+                for second in sfx.flags:
+                    for sfx2 in self.affixes.get(second, ()):
+                        if sfx2.kind == 'SFX':
+                            form2 = sfx2.apply(form)
+                            if form2 is not None:
+                                yield form2
+        for flag in flags:
+            for pfx in self.affixes.get(flag, ()):
+                if pfx.kind != 'PFX':
+                    continue
+                form = pfx.apply(word)
+                if form is None:
+                    continue
+                if self.needaffix not in pfx.flags:
+                    yield form
+                if pfx.cross:
+                    for stem, sfx in suffixed:
+                        if sfx.cross:
+                            form = pfx.apply(stem)
+                            if form is not None:
+                                yield form
+
+
+def get_stamp(dpath, apath):
+    """Return (mtime, size) stamp of a dictionary, changing when either of its files changes."""
+    dstamp = cache.get_stamp(dpath)
+    astamp = cache.get_stamp(apath)
+    return max(dstamp[0], astamp[0]), dstamp[1] + astamp[1]
+
+
+def expand(dpath, apath):
+    """Return a dict of all lower cased forms of words in dictionary, encoded as UTF-8, mapped to their rank.
+
+    Rank of a form is the line number of the first word it is a form of.
+    """
+    affixes = Affixes(apath)
+    words = {}
+    with open(dpath, encoding=affixes.encoding, errors='replace') as f:
+        f.readline()  # Number of words.
+        for rank, line in enumerate(f, 1):
+            # Morphological fields are separated by white space, flags by a slash, escaped slashes are part of a word.
+            entry = line.split(None, 1)[0] if line.strip() else ''
+            word, _, flags = entry.replace('\\/', '\0').partition('/')
+            word = word.replace('\0', '/')
+            if not word:
+                continue
+            for form in affixes.expand(word, affixes.get_flags(flags)):
+                words.setdefault(form.lower().encode('utf-8'), rank)
+    return words
+
+
+def compile(dpath, apath, target=None):
+    """Expand dictionary and write it as a compiled wordlist to target, by default to the file used by load()."""
+    target = target or cache.get_path(dpath, 'hunspell')
+    return wordlist.write(expand(dpath, apath), target, get_stamp(dpath, apath))
+
+
+def load(dpath, apath):
+    """Return compiled wordlist of all forms of words in dictionary, expanding it on first use.
+
+    Raises Unsupported if affix rules of the dictionary can't be expanded.
+    """
+    path = cache.get_path(dpath, 'hunspell')
+    words = wordlist.load_compiled(path, stamp=get_stamp(dpath, apath))
+    if words is None:
+        try:
+            words = wordlist.load_compiled(compile(dpath, apath))
+        except OSError:
+            if not os.path.exists(dpath) or not os.path.exists(apath):
+                raise
+            # Cache directory is not writable, the expanded dictionary is kept in memory.
+            words = wordlist.Wordlist(dpath, expand(dpath, apath))
+    return words
+
+
+class LazyDictionary(collections.abc.Mapping):
+    """Forms of words of a dictionary mapped to their rank, expanded with load() on first use.
+
+    A dictionary whose affix rules can't be expanded is empty.
+    """
+
+    def __init__(self, dpath, apath):
+        self.dpath = dpath
+        self.apath = apath
+        self.words = None
+
+    def available(self):
+        return os.path.exists(self.dpath) and os.path.exists(self.apath)
+
+    def load(self):
+        if self.words is None:
+            try:
+                self.words = load(self.dpath, self.apath)
+            except Unsupported:
+                self.words = {}
+        return self.words
+
+    def __len__(self):
+        return len(self.load())
+
+    def __iter__(self):
+        return iter(self.load())
+
+    def __contains__(self, word):
+        return word in self.load()
+
+    def __getitem__(self, word):
+        return self.load()[word]
+
+    @property
+    def max_length(self):
+        return wordlist.get_max_length(self.load())
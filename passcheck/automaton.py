@@ -0,0 +1,70 @@
+from array import array
+from collections import deque
+
+
+class Automaton(object):
+    """Aho-Corasick automaton finding all case-insensitive occurrences of given words in a single pass."""
+
+    def __init__(self, words):
+        goto = {}
+        depth = array('I', [0])
+        terminal = bytearray(1)
+
+        for word in words:
+            state = 0
+            for byte in word.lower():
+                key = state << 8 | byte
+                if key in goto:
+                    state = goto[key]
+                else:
+                    goto[key] = state = len(depth)
+                    depth.append(depth[key >> 8] + 1)
+                    terminal.append(0)
+            terminal[state] = 1
+
+        children = [[] for _ in range(len(depth))]
+        for key, state in goto.items():
+            children[key >> 8].append((key & 0xff, state))
+
+        fail = array('I', [0]) * len(depth)
+        # Nearest terminal state reachable through failure links, 0 if there is none.
+        output = array('I', [0]) * len(depth)
+        queue = deque(state for _, state in children[0])
+        while queue:
+            state = queue.popleft()
+            for byte, child in children[state]:
+                queue.append(child)
+                f = fail[state]
+                while f and (f << 8 | byte) not in goto:
+                    f = fail[f]
+                f = goto.get(f << 8 | byte, 0)
+                fail[child] = f
+                output[child] = f if terminal[f] else output[f]
+
+        self.goto = goto
+        self.fail = fail
+        self.depth = depth
+        self.terminal = terminal
+        self.output = output
+
+    def find(self, text):
+        """Yield (i, j) positions of all words found in text, so that text[i:j].lower() is a lower cased word."""
+        goto = self.goto
+        fail = self.fail
+        depth = self.depth
+        terminal = self.terminal
+        output = self.output
+        state = 0
+        for j, byte in enumerate(text.lower(), 1):
+            while True:
+                nxt = goto.get(state << 8 | byte)
+                if nxt is not None:
+                    state = nxt
+                    break
+                if state == 0:
+                    break
+                state = fail[state]
+            s = state if terminal[state] else output[state]
+            while s:
+                yield j - depth[s], j
+                s = output[s]
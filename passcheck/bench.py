@@ -0,0 +1,227 @@
+"""Benchmarks of the scoring engine, run with passcheck bench or python -m passcheck.bench.
+
+Passwords are generated reproducibly from a seed, for a number of corpora differing in password length, characters
+used and how many dictionary words they contain. Results can be saved as JSON and compared with results of an earlier
+run.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import resource
+import statistics
+import string
+import subprocess
+import sys
+import time
+
+
+SYLLABLES = ['pass', 'word', 'dragon', 'sun', 'shine', 'qwe', 'rty', 'love', 'slapta', 'žodis', 'admin', 'monkey']
+
+ALPHABETS = {
+    'mixed': string.ascii_letters + string.digits + string.punctuation,
+    'letters': string.ascii_letters,
+    'digits': string.digits,
+}
+
+CORPORA = {
+    'short': dict(min_length=8, max_length=16),
+    'medium': dict(min_length=17, max_length=64),
+    'long': dict(min_length=65, max_length=256),
+    'digits': dict(min_length=8, max_length=16, alphabet='digits', density=0),
+    'letters': dict(min_length=8, max_length=32, alphabet='letters', density=0),
+    'words': dict(min_length=8, max_length=32, density=0.9),
+    'binary': dict(min_length=8, max_length=32, alphabet='binary', density=0),
+}
+
+COLD_START = (
+    'import time; start = time.perf_counter(); '
+    'from passcheck.passcheck import get_default_passcheck; get_default_passcheck().check(b"password"); '
+    'print(time.perf_counter() - start)'
+)
+
+
+def generate(count, seed=0, min_length=8, max_length=16, alphabet='mixed', density=0.4):
+    """Return a reproducible list of passwords.
+
+    Passwords are built from words, with given density, and short runs of characters from alphabet, which is one of
+    ALPHABETS or 'binary' for random bytes.
+    """
+    rand = random.Random(seed)
+    passwords = []
+    for _ in range(count):
+        password = b''
+        length = rand.randint(min_length, max_length)
+        while len(password) < length:
+            if rand.random() < density:
+                word = rand.choice(SYLLABLES)
+                password += (word.title() if rand.random() < 0.3 else word).encode()
+            elif alphabet == 'binary':
+                password += bytes(rand.randrange(256) for _ in range(rand.randint(1, 4)))
+            else:
+                password += ''.join(rand.choice(ALPHABETS[alphabet]) for _ in range(rand.randint(1, 4))).encode()
+        passwords.append(password[:length])
+    return passwords
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def latency(passcheck, passwords):
+    """Return latency percentiles and throughput of checking passwords one by one."""
+    seconds = []
+    for password in passwords:
+        start = time.perf_counter()
+        passcheck.check(password)
+        seconds.append(time.perf_counter() - start)
+    return {
+        'passwords': len(passwords),
+        'seconds': sum(seconds),
+        'throughput': len(passwords) / sum(seconds),
+        'p50': percentile(seconds, 50),
+        'p90': percentile(seconds, 90),
+        'p99': percentile(seconds, 99),
+        'max': max(seconds),
+    }
+
+
+def pattern_costs(passcheck, passwords):
+    """Return seconds spent by each pattern to match and score all fragments of passwords."""
+    from passcheck.passcheck import Value
+
+    costs = dict.fromkeys((str(p) for p in passcheck.patterns), 0.0)
+    for password in passwords:
+        for i, j in itertools.combinations(range(len(password) + 1), 2):
+            value = Value(password[i:j])
+            for pattern in passcheck.patterns:
+                start = time.perf_counter()
+                if pattern.matches(value):
+                    pattern.entropy(value)
+                costs[str(pattern)] += time.perf_counter() - start
+    return costs
+
+
+def scaling(passcheck, passwords, jobs):
+    """Yield (workers, seconds, passwords per second) for each number of workers in jobs."""
+    passcheck.load()
+    for workers in jobs:
+        start = time.perf_counter()
+        for _ in passcheck.check_many(passwords, workers=workers):
+            pass
+        seconds = time.perf_counter() - start
+        yield workers, seconds, len(passwords) / seconds
+
+
+def cold_start(runs=3):
+    """Return median time to import passcheck and check a password in a new process."""
+    seconds = []
+    for _ in range(runs):
+        output = subprocess.check_output([sys.executable, '-c', COLD_START])
+        seconds.append(float(output))
+    return statistics.median(seconds)
+
+
+def peak_rss():
+    """Return peak resident memory of this process in bytes."""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+
+def run(passcheck, corpora, count, seed=0, jobs=(1,), cold_start_runs=3):
+    results = {
+        'python': platform.python_version(),
+        'cpus': os.cpu_count(),
+        'seed': seed,
+        'cold_start': cold_start(cold_start_runs) if cold_start_runs else None,
+        'corpora': {},
+    }
+    passcheck.load()
+    for name in corpora:
+        results['corpora'][name] = latency(passcheck, generate(count, seed, **CORPORA[name]))
+    results['patterns'] = pattern_costs(passcheck, generate(min(count, 20), seed, **CORPORA['short']))
+    results['scaling'] = [
+        {'workers': workers, 'seconds': seconds, 'throughput': throughput}
+        for workers, seconds, throughput in scaling(passcheck, generate(count, seed), jobs)
+    ]
+    results['peak_rss'] = peak_rss()
+    return results
+
+
+def compare(base, results):
+    """Yield (metric, base value, new value) for numeric metrics present in both results."""
+    metrics = [('cold_start', base.get('cold_start'), results.get('cold_start'))]
+    for name, corpus in results['corpora'].items():
+        for key in ('throughput', 'p50', 'p90', 'p99'):
+            metrics.append(('%s %s' % (name, key), base.get('corpora', {}).get(name, {}).get(key), corpus[key]))
+    metrics.append(('peak_rss', base.get('peak_rss'), results.get('peak_rss')))
+    for metric, old, new in metrics:
+        if old and new:
+            yield metric, old, new
+
+
+def main(argv=None, out=sys.stdout):
+    from passcheck.passcheck import get_default_passcheck
+
+    parser = argparse.ArgumentParser(prog='passcheck bench', description="Benchmark the scoring engine.")
+    parser.add_argument('-n', dest='count', type=int, default=200, help="Number of passwords in each corpus.")
+    parser.add_argument('-j', dest='jobs', default='1', help="Comma separated numbers of worker processes.")
+    parser.add_argument('--seed', type=int, default=0, help="Seed used to generate passwords.")
+    parser.add_argument('--corpus', action='append', choices=sorted(CORPORA), help=(
+        "Benchmark only given corpora, can be used multiple times."
+    ))
+    parser.add_argument('--cold-start-runs', type=int, default=3, help=(
+        "Number of new processes started to measure cold start time, 0 to skip."
+    ))
+    parser.add_argument('-o', dest='output', help="Save results as JSON to this file.")
+    parser.add_argument('--compare', help="Compare results with JSON results saved by an earlier run.")
+
+    args = parser.parse_args(argv)
+
+    def echo(*args):
+        print(*args, file=out)
+
+    corpora = args.corpus or list(CORPORA)
+    jobs = [int(j) for j in args.jobs.split(',')]
+    results = run(get_default_passcheck(), corpora, args.count, args.seed, jobs, args.cold_start_runs)
+
+    echo('Python %s, CPUs: %d' % (results['python'], results['cpus']))
+    if results['cold_start'] is not None:
+        echo('Cold start: %.3fs' % results['cold_start'])
+    echo('Peak RSS: %.1f MB' % (results['peak_rss'] / 2**20))
+    echo()
+    echo('%-10s %12s %10s %10s %10s %10s' % ('corpus', 'passwords/s', 'p50 ms', 'p90 ms', 'p99 ms', 'max ms'))
+    for name, r in results['corpora'].items():
+        echo('%-10s %12.1f %10.3f %10.3f %10.3f %10.3f' % (
+            name, r['throughput'], r['p50'] * 1e3, r['p90'] * 1e3, r['p99'] * 1e3, r['max'] * 1e3,
+        ))
+    echo()
+    echo('Pattern cost:')
+    for pattern, seconds in sorted(results['patterns'].items(), key=lambda x: -x[1]):
+        echo('%10.3f ms  %s' % (seconds * 1e3, pattern))
+    echo()
+    baseline = results['scaling'][0]['throughput']
+    for r in results['scaling']:
+        echo('workers: %2d  time: %8.3fs  passwords/s: %10.1f  speedup: %5.2fx' % (
+            r['workers'], r['seconds'], r['throughput'], r['throughput'] / baseline,
+        ))
+
+    if args.compare:
+        with open(args.compare) as f:
+            base = json.load(f)
+        echo()
+        echo('Compared to %s:' % args.compare)
+        for metric, old, new in compare(base, results):
+            echo('%-20s %12.4g -> %12.4g  %+7.1f%%' % (metric, old, new, (new - old) / old * 100))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+import collections
+import hashlib
+import marshal
+import os
+import os.path
+import threading
+import weakref
+
+
+def get_cache_dir():
+    if os.environ.get('PASSCHECK_CACHE_DIR'):
+        return os.environ['PASSCHECK_CACHE_DIR']
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
+    return os.path.join(base, 'passcheck')
+
+
+def get_path(source, kind):
+    """Return path of a cache file of given kind, derived from source file."""
+    source = os.path.abspath(source)
+    digest = hashlib.sha1(source.encode()).hexdigest()[:12]
+    return os.path.join(get_cache_dir(), '%s-%s.%s' % (os.path.basename(source), digest, kind))
+
+
+def get_stamp(source):
+    stat = os.stat(source)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def load(source, kind, build):
+    """Return data built from source file by calling build().
+
+    Built data is saved to the cache directory and reused by later calls, as long as source file is not changed. Data
+    must be serialisable with marshal.
+    """
+    path = get_path(source, kind)
+    stamp = get_stamp(source)
+
+    try:
+        with open(path, 'rb') as f:
+            cached_stamp, data = marshal.load(f)
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+    else:
+        if tuple(cached_stamp) == stamp:
+            return data
+
+    data = build()
+    save(path, (stamp, data))
+    return data
+
+
+def save(path, data):
+    tmp = '%s.%d.tmp' % (path, os.getpid())
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp, 'wb') as f:
+            marshal.dump(data, f)
+        os.replace(tmp, path)
+    except OSError:
+        # Cache is an optimisation, if it can't be written, data will be built again next time.
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+
+
+_lru_caches = weakref.WeakSet()
+
+
+def _reset_locks():
+    # A lock held by another thread while forking would stay locked forever in the child process.
+    for lru in _lru_caches:
+        lru.lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_locks)
+
+
+class LRUCache(object):
+    """Bounded in memory cache, safe to use from multiple threads and forked processes.
+
+    With 'lru' policy, least recently used entries are evicted first, with 'fifo', oldest entries are evicted first.
+    """
+
+    policies = ('lru', 'fifo')
+
+    def __init__(self, size, policy='lru'):
+        if policy not in self.policies:
+            raise ValueError("Unknown eviction policy %r, expected one of: %s." % (policy, ', '.join(self.policies)))
+        self.size = size
+        self.policy = policy
+        self.data = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        _lru_caches.add(self)
+
+    def __len__(self):
+        return len(self.data)
+
+    def get(self, key):
+        with self.lock:
+            value = self.data.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                if self.policy == 'lru':
+                    self.data.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self.lock:
+            self.data[key] = value
+            self.data.move_to_end(key)
+            while len(self.data) > self.size:
+                self.data.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+            self.hits = 0
+            self.misses = 0
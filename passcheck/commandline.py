@@ -1,22 +1,233 @@
 import argparse
-import binascii
 import functools
-import getpass
 import math
+import operator
 import os
 import os.path
-import random
 import sys
 import time
 
-from passcheck.passcheck import get_default_passcheck
-from passcheck.formatting import format_number, format_seconds
+from passcheck.formatting import format_brute_force, format_number, format_record, power_of_two
+
+# Anything else is imported only when needed, this script is called often and startup time matters.
+
+
+def compile_wordlist(argv, out):
+    parser = argparse.ArgumentParser(prog='passcheck compile-wordlist', description=(
+        "Compile wordlists into a memory mapped format, used automatically by passcheck instead of the text files."
+    ))
+    parser.add_argument('sources', nargs='*', default=None, help="Wordlist text files, one word per line.")
+    parser.add_argument('-o', dest='target', help="Where to write compiled wordlist, only with a single source.")
+
+    args = parser.parse_args(argv)
+
+    from passcheck import wordlist
+    from passcheck.passcheck import WORDLISTS
+
+    sources = args.sources or [path for path in WORDLISTS if os.path.exists(path)]
+    if args.target and len(sources) != 1:
+        parser.error("-o can only be used with a single source.")
+
+    for source in sources:
+        target = wordlist.compile(source, args.target)
+        print('%s -> %s' % (source, target), file=out)
+
+
+def build_corpus(argv, out):
+    parser = argparse.ArgumentParser(prog='passcheck build-corpus', description=(
+        "Build a breached password corpus, too big to be used as a wordlist, into a memory mapped file."
+    ))
+    parser.add_argument('source', help=(
+        "Text file with one password per line, or with --sha1, one hex encoded SHA-1 hash of a password per line."
+    ))
+    parser.add_argument('-o', dest='target', help="Where to write the corpus, by default where passcheck looks for it.")
+    parser.add_argument('--sha1', dest='hashed', action='store_true', help="Lines are SHA-1 hashes of passwords.")
+    parser.add_argument('--counts', action='store_true', help=(
+        "Lines end with a colon and the number of times a password was seen."
+    ))
+    parser.add_argument('--ranked', action='store_true', help=(
+        "Build a table of hashes ranked by counts, or by line without --counts, instead of a Bloom filter."
+    ))
+    parser.add_argument('--false-positive-rate', type=float, default=0.001, help=(
+        "Rate of passwords wrongly found in a Bloom filter, lower rates take more space."
+    ))
+
+    args = parser.parse_args(argv)
+
+    from passcheck import corpus
+    from passcheck.passcheck import CORPUS
+
+    target = corpus.build(
+        args.source, args.target or CORPUS, args.ranked, args.false_positive_rate, args.hashed, args.counts,
+    )
+    print('%s -> %s' % (args.source, target), file=out)
+
+
+def read_rows(f, delimiter, size=2**16):
+    """Yield delimited rows from binary file f, reading it in chunks."""
+    rest = b''
+    while True:
+        chunk = f.read(size)
+        if not chunk:
+            break
+        rows = (rest + chunk).split(delimiter)
+        rest = rows.pop()
+        yield from rows
+    if rest:
+        yield rest
+
+
+def read_passwords(f, delimiter, unhexlify=False, size=2**16, errors=None):
+    """Yield delimited passwords from binary file f, hex decoded if unhexlify.
+
+    Rows that are not valid hex are skipped, (row, message) of each of them is appended to errors, or printed to stderr
+    if errors is None, so that a bad row does not stop checking the rest.
+    """
+    rows = read_rows(f, delimiter, size)
+    if not unhexlify:
+        yield from rows
+        return
+    import binascii
+    for n, row in enumerate(rows, 1):
+        try:
+            yield binascii.unhexlify(row.strip())
+        except binascii.Error as e:
+            error = 'Invalid hex: %s' % e
+            if errors is None:
+                print('Row %d: %s' % (n, error), file=sys.stderr)
+            else:
+                errors.append((n, error))
+
+
+def number_records(results, errors):
+    """Yield (n, result, error) of each row read by read_passwords(), results are of passwords it yielded, errors are
+    rows it skipped, which are put back in their place with result None.
+    """
+    n = 0
+    k = 0
+    for result in results:
+        n += 1
+        while k < len(errors) and errors[k][0] == n:
+            yield n, None, errors[k][1]
+            k += 1
+            n += 1
+        yield n, result, None
+    for row, error in errors[k:]:
+        yield row, None, error
+
+
+def print_profile(stats, debug, out):
+    if debug:
+        import json
+        print(json.dumps(stats.as_dict(), indent=2), file=out)
+    else:
+        for line in stats.report():
+            print(line, file=out)
+
+
+def check_many(args, out):
+    import json
+    from passcheck.passcheck import get_default_passcheck
+
+    delimiter = b'\0' if args.null else b'\n'
+    f = sys.stdin.buffer if args.input == '-' else open(args.input, 'rb')
+    try:
+        # Rows that are not valid hex get an error record instead of stopping the whole stream.
+        errors = []
+        passwords = read_passwords(f, delimiter, args.unhexlify, errors=errors)
+        passcheck = get_default_passcheck(
+            debug=args.debug, cache_size=args.cache_size, profile=args.profile, max_span=args.max_span,
+        )
+        if args.min_bits is not None:
+            return check_min_bits(passcheck, passwords, args.min_bits, out, errors)
+        for n, results, error in number_records(passcheck.check_many(passwords, workers=args.jobs), errors):
+            record = dict(n=n, **format_record(results)) if error is None else {'n': n, 'error': error}
+            print(json.dumps(record, separators=(',', ':')), file=out)
+        if args.profile:
+            # Records are written to out, so profile goes to stderr.
+            print_profile(passcheck.stats, args.debug, sys.stderr)
+    finally:
+        if f is not sys.stdin.buffer:
+            f.close()
+
+
+def check_min_bits(passcheck, passwords, min_bits, out, errors=()):
+    import json
+
+    status = 0
+    meets = (passcheck.meets(password, min_bits) for password in passwords)
+    for n, meets, error in number_records(meets, errors):
+        record = {'n': n, 'meets': meets} if error is None else {'n': n, 'error': error}
+        print(json.dumps(record, separators=(',', ':')), file=out)
+        status = status or int(not meets)
+    return status
+
+
+def print_min_bits(meets, min_bits, verbosity, out):
+    if verbosity > 0 and meets:
+        print('Pass: entropy is at least %g bits' % min_bits, file=out)
+    elif verbosity > 0:
+        print('Fail: entropy is less than %g bits' % min_bits, file=out)
+    return 0 if meets else 1
+
+
+def serve(argv, out):
+    parser = argparse.ArgumentParser(prog='passcheck serve', description=(
+        "Keep passcheck loaded and check passwords sent over a Unix domain socket, see passcheck --socket."
+    ))
+    parser.add_argument('--socket', required=True, help="Path of the socket to listen on.")
+    parser.add_argument('--threads', type=int, default=4, help="Number of passwords checked concurrently.")
+    parser.add_argument('--cache-size', type=int, default=100000, help="Number of fragments whose results are cached.")
+
+    args = parser.parse_args(argv)
+
+    from passcheck import server
+    from passcheck.passcheck import get_default_passcheck
+
+    print('Listening on %s' % args.socket, file=out)
+    # Fragments are only scored up to the longest word or sequence, so that passwords are checked in linear time.
+    passcheck = get_default_passcheck(cache_size=args.cache_size, max_span='auto')
+    server.serve(passcheck, args.socket, args.threads)
+
+
+def bench(argv, out):
+    from passcheck import bench
+    bench.main(argv, out)
+
+
+commands = {
+    'bench': bench,
+    'build-corpus': build_corpus,
+    'compile-wordlist': compile_wordlist,
+    'serve': serve,
+}
+
+
+def max_span(value):
+    return value if value == 'auto' else positive_int(value)
+
+
+def positive_int(value):
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError("invalid int value: %r" % value)
+    if number < 1:
+        raise argparse.ArgumentTypeError("must be at least 1, got %d" % number)
+    return number
 
 
 def main(argv=None, out=sys.stdout):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in commands:
+        return commands[argv[0]](argv[1:], out)
+
     parser = argparse.ArgumentParser()
     parser.add_argument('password', nargs='?')
     parser.add_argument('--debug', action='store_true', default=False, help="Turn on debug mode.")
+    parser.add_argument('--profile', action='store_true', default=False, help=(
+        "Show time spent in each pattern, as JSON with --debug."
+    ))
     parser.add_argument('-q', dest='verbosity', action='append_const', const=-1, help="Be more quiet.")
     parser.add_argument('-v', dest='verbosity', action='append_const', const=1, help="Be more verbose.")
     parser.add_argument('-p', dest='askpass', action='store_true', help=(
@@ -25,45 +236,103 @@ def main(argv=None, out=sys.stdout):
     parser.add_argument('-x', dest='unhexlify', action='store_true', help=(
         "Decode provided password from hex serialisation."
     ))
+    parser.add_argument('-i', '--input', help=(
+        "Check passwords read from a file, one per line, and print one JSON record per password. Use - for stdin."
+    ))
+    parser.add_argument('-0', dest='null', action='store_true', help=(
+        "Passwords read with -i are separated by NUL instead of newline characters."
+    ))
+    parser.add_argument('-j', '--jobs', type=int, default=1, help=(
+        "Number of processes checking passwords read with -i."
+    ))
+    parser.add_argument('--cache-size', type=int, default=100000, help=(
+        "Number of fragments whose results are cached while checking passwords read with -i."
+    ))
+    parser.add_argument('--socket', help=(
+        "Send password to a daemon started with passcheck serve, listening on this socket."
+    ))
+    parser.add_argument('--max-span', type=max_span, help=(
+        "Do not score fragments longer than this many bytes, except runs of the same byte, so that long passwords are "
+        "checked in linear time. Use auto for the longest word or sequence known to patterns."
+    ))
+    parser.add_argument('--min-bits', type=float, help=(
+        "Only tell if entropy is at least this many bits, exit with status 1 if it is not. With -i, prints a JSON "
+        "record per password telling if it is."
+    ))
+    parser.add_argument('--top', type=positive_int, metavar='N', help=(
+        "Also print N compositions of password with the lowest entropy, other ways it could be guessed."
+    ))
 
     args = parser.parse_args(argv)
 
+    if args.input:
+        if args.password or args.askpass:
+            parser.error("-i can't be used together with a password or -p.")
+        return check_many(args, out)
+
     def echo(*args):
         print(*args, file=out)
 
     verbosity = sum(args.verbosity or []) + 1
 
     if args.askpass:
+        import getpass
         password = getpass.getpass()
     elif args.password:
         password = args.password.encode()
         if args.unhexlify:
+            import binascii
             password = binascii.unhexlify(password)
     else:
+        import random
         password = os.urandom(random.randint(8, 32))
         echo("Password (hex): %s" % repr(password).lstrip('b'))
 
+    if args.socket:
+        from passcheck import server
+        record = server.request(args.socket, password)
+        if args.min_bits is not None:
+            return print_min_bits(record['entropy'] >= args.min_bits, args.min_bits, verbosity, out)
+        echo()
+        echo('Entropy: %d bits' % math.ceil(record['entropy']))
+        if verbosity > 0:
+            echo('Number of bytes: %d' % record['bytes'])
+            echo('Pattern detected: %s' % ' | '.join(record['patterns']))
+        return
+
+    from passcheck.passcheck import get_default_passcheck
+
     start_time = time.time()
 
-    results = get_default_passcheck(debug=args.debug).check(password)
+    passcheck = get_default_passcheck(debug=args.debug, profile=args.profile, max_span=args.max_span)
+    if args.min_bits is not None:
+        return print_min_bits(passcheck.meets(password, args.min_bits), args.min_bits, verbosity, out)
+    if args.top is not None:
+        compositions = passcheck.check(password, k=args.top)
+        results = compositions[0]
+    else:
+        results = passcheck.check(password)
 
-    entropy = 0
-    combinations = 1
+    entropy = sum(r.entropy for r in results)
+    if verbosity > 1:
+        combinations = functools.reduce(operator.mul, (r.combinations for r in results), 1)
+    else:
+        # Number of combinations is not needed to compute entropy and can be huge, so it is computed exactly only in
+        # verbose mode.
+        combinations = power_of_two(entropy)
 
     echo()
 
     for r in results:
-        entropy += r.entropy
-        combinations *= r.combinations
         if verbosity > 1:
             echo('- Fragment: %s' % repr(r.value.bytes).lstrip('b'))
             echo('  Entropy: %d bits' % math.ceil(r.entropy))
             echo('  Number of bytes: %d' % len(r.value.bytes))
             echo('  Pattern detected: %s' % r.pattern)
             echo('  Number of possible passwords: %s' % format_number(r.combinations))
-            echo('  Brute force (1000 guesses/second): %s' % format_seconds(r.combinations / 1000))
-            echo('  Brute force (1e09 guesses/second): %s' % format_seconds(r.combinations / 1e09))
-            echo('  Brute force (1e12 guesses/second): %s' % format_seconds(r.combinations / 1e12))
+            echo('  Brute force (1000 guesses/second): %s' % format_brute_force(r.combinations, 1000))
+            echo('  Brute force (1e09 guesses/second): %s' % format_brute_force(r.combinations, 1e09))
+            echo('  Brute force (1e12 guesses/second): %s' % format_brute_force(r.combinations, 1e12))
             echo()
 
     echo('Entropy: %d bits' % math.ceil(entropy))
@@ -71,7 +340,20 @@ def main(argv=None, out=sys.stdout):
         echo('Number of bytes: %d' % len(password))
         echo('Pattern detected: %s' % ' | '.join(str(r.pattern) for r in results))
         echo('Number of possible passwords: %s' % format_number(combinations))
-        echo('Brute force (1000 guesses/second): %s' % format_seconds(combinations / 1000))
-        echo('Brute force (1e09 guesses/second): %s' % format_seconds(combinations / 1e09))
-        echo('Brute force (1e12 guesses/second): %s' % format_seconds(combinations / 1e12))
+        echo('Brute force (1000 guesses/second): %s' % format_brute_force(combinations, 1000))
+        echo('Brute force (1e09 guesses/second): %s' % format_brute_force(combinations, 1e09))
+        echo('Brute force (1e12 guesses/second): %s' % format_brute_force(combinations, 1e12))
         echo('Time to process: %.06f seconds' % (time.time() - start_time))
+
+    if args.top is not None:
+        echo()
+        echo('Top %d compositions:' % len(compositions))
+        for n, composition in enumerate(compositions, 1):
+            echo('%d. %d bits: %s' % (
+                n, math.ceil(sum(r.entropy for r in composition)),
+                ' | '.join('%s %s' % (repr(r.value.bytes).lstrip('b'), r.pattern) for r in composition),
+            ))
+
+    if args.profile:
+        echo()
+        print_profile(passcheck.stats, args.debug, out)
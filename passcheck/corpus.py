@@ -0,0 +1,241 @@
+"""Breached password corpora, too big to be loaded as wordlists.
+
+A corpus is built from a text file with one password or hex encoded SHA-1 hash of a password per line, optionally
+followed by a colon and the number of times it was seen, into one of two memory mapped files, looked up by SHA-1 of a
+value:
+
+- a Bloom filter, telling if a value is in the corpus, with a given rate of false positives,
+- a table of sorted truncated hashes, with a rank of each value by the number of times it was seen, or by its line if
+  counts are not given.
+
+Both start with a header (magic, number of passwords, a field depending on kind, length of the longest password or 0 if
+it is not known). A Bloom filter stores the number of hash functions in its field, followed by its bits, a table stores
+0, followed by arrays of native unsigned 64 bit hashes and 32 bit ranks.
+"""
+
+import array
+import binascii
+import bisect
+import hashlib
+import heapq
+import math
+import mmap
+import os
+import os.path
+import shutil
+import struct
+import tempfile
+
+
+BLOOM_MAGIC = b'PCBF\x00\x00\x00\x01'
+TABLE_MAGIC = b'PCHT\x00\x00\x00\x01'
+HEADER = struct.Struct('=8sQQQ')
+
+
+def read(path, hashed=False, counts=False):
+    """Yield (SHA-1 digest, count, length) of each password in a text file, length is None for hashed passwords.
+
+    count is 1 if counts are not given.
+    """
+    with open(path, 'rb') as f:
+        for line in f:
+            line = line.rstrip(b'\r\n')
+            count = 1
+            if counts:
+                line, _, count = line.rpartition(b':')
+                count = int(count)
+            if hashed:
+                yield binascii.unhexlify(line.strip()), count, None
+            else:
+                yield hashlib.sha1(line).digest(), count, len(line)
+
+
+def get_positions(digest, bits, hashes):
+    """Return positions of bits of digest in a Bloom filter, derived from two 64 bit halves of digest."""
+    a = int.from_bytes(digest[:8], 'big')
+    b = int.from_bytes(digest[8:16], 'big') | 1
+    return [(a + i * b) % bits for i in range(hashes)]
+
+
+def build_bloom(source, target, false_positive_rate=0.001, hashed=False, counts=False):
+    """Build a Bloom filter of passwords in source, with given rate of false positives."""
+    if not 0 < false_positive_rate < 1:
+        raise ValueError("false_positive_rate must be between 0 and 1, got %r." % (false_positive_rate,))
+    count = 0
+    max_length = 0
+    for _, _, length in read(source, hashed, counts):
+        count += 1
+        max_length = max(max_length, length or 0)
+    bits = max(64, math.ceil(-count * math.log(false_positive_rate) / math.log(2)**2))
+    bits += -bits % 8
+    hashes = max(1, round(bits / max(count, 1) * math.log(2)))
+
+    tmp = '%s.%d.tmp' % (target, os.getpid())
+    with open(tmp, 'w+b') as f:
+        f.write(HEADER.pack(BLOOM_MAGIC, count, hashes, max_length))
+        f.truncate(HEADER.size + bits // 8)
+        # Bits are set in the memory mapped file, so that the filter does not need to fit into memory.
+        with mmap.mmap(f.fileno(), 0) as mm:
+            for digest, _, _ in read(source, hashed, counts):
+                for position in get_positions(digest, bits, hashes):
+                    mm[HEADER.size + (position >> 3)] |= 1 << (position & 7)
+    os.replace(tmp, target)
+    return target
+
+
+def sort_runs(entries, directory, size):
+    """Write entries, (hash, value) tuples, to files of sorted runs of size entries, returns their paths."""
+    paths = []
+    while True:
+        run = sorted(entry for _, entry in zip(range(size), entries))
+        if not run:
+            return paths
+        path = os.path.join(directory, '%d.run' % len(paths))
+        with open(path, 'wb') as f:
+            array.array('Q', (x for entry in run for x in entry)).tofile(f)
+        paths.append(path)
+
+
+def read_run(path, size=2**16):
+    """Yield (hash, value) tuples of a run, reading size of them at a time."""
+    with open(path, 'rb') as f:
+        while True:
+            data = array.array('Q', f.read(16 * size))
+            if not data:
+                break
+            yield from zip(data[::2], data[1::2])
+
+
+def build_table(source, target, hashed=False, counts=False, run_size=2**20):
+    """Build a table of truncated hashes of passwords in source, ranked by their counts.
+
+    Hashes are sorted in runs of run_size passwords, which are merged, so that the table does not need to fit into
+    memory. Counts of passwords seen more than once are added up. Without counts, passwords are ranked by their first
+    line, like words of a wordlist.
+    """
+    max_length = 0
+
+    def entries():
+        nonlocal max_length
+        for line, (digest, count, length) in enumerate(read(source, hashed, counts), 1):
+            max_length = max(max_length, length or 0)
+            yield int.from_bytes(digest[:8], 'big'), count if counts else line
+
+    directory = os.path.dirname(os.path.abspath(target))
+    with tempfile.TemporaryDirectory(dir=directory) as tmpdir:
+        runs = sort_runs(entries(), tmpdir, run_size)
+
+        def merged():
+            last = None
+            total = 0
+            for h, value in heapq.merge(*map(read_run, runs)):
+                if h == last:
+                    if counts:
+                        total += value
+                    continue
+                if last is not None:
+                    yield last, total
+                last, total = h, value
+            if last is not None:
+                yield last, total
+
+        # Rank of a password is 1 + the number of passwords seen more times, there are few distinct counts.
+        n = 0
+        ranks = {}
+        for _, value in merged():
+            n += 1
+            if counts:
+                ranks[value] = ranks.get(value, 0) + 1
+        rank = 1
+        for count in sorted(ranks, reverse=True):
+            ranks[count], rank = rank, rank + ranks[count]
+
+        tmp = '%s.%d.tmp' % (target, os.getpid())
+        with open(tmp, 'wb') as f, tempfile.TemporaryFile(dir=tmpdir) as rest:
+            f.write(HEADER.pack(TABLE_MAGIC, n, 0, max_length))
+            for chunk in chunked(merged(), run_size):
+                array.array('Q', (h for h, _ in chunk)).tofile(f)
+                array.array('I', (ranks[v] if counts else v for _, v in chunk)).tofile(rest)
+            rest.seek(0)
+            shutil.copyfileobj(rest, f)
+    os.replace(tmp, target)
+    return target
+
+
+def chunked(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def build(source, target, ranked=False, false_positive_rate=0.001, hashed=False, counts=False):
+    """Build a corpus from source text file, a table if ranked, otherwise a Bloom filter."""
+    os.makedirs(os.path.dirname(os.path.abspath(target)), exist_ok=True)
+    if ranked:
+        return build_table(source, target, hashed, counts)
+    return build_bloom(source, target, false_positive_rate, hashed, counts)
+
+
+class BloomFilter(object):
+
+    ranked = False
+
+    def __init__(self, path, mm):
+        self.path = path
+        self.mm = mm
+        _, self.count, self.hashes, self.max_length = HEADER.unpack_from(mm)
+        self.bits = (len(mm) - HEADER.size) * 8
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, digest):
+        mm = self.mm
+        return all(mm[HEADER.size + (p >> 3)] >> (p & 7) & 1 for p in get_positions(digest, self.bits, self.hashes))
+
+    def rank(self, digest):
+        return None
+
+
+class Table(object):
+
+    ranked = True
+
+    def __init__(self, path, mm):
+        self.path = path
+        self.mm = mm
+        _, self.count, _, self.max_length = HEADER.unpack_from(mm)
+        view = memoryview(mm)
+        start = HEADER.size
+        self.hashes = view[start:start + 8 * self.count].cast('Q')
+        start += 8 * self.count
+        self.ranks = view[start:start + 4 * self.count].cast('I')
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, digest):
+        return self.rank(digest) is not None
+
+    def rank(self, digest):
+        """Return rank of password with given SHA-1 digest, None if it is not in the table."""
+        h = int.from_bytes(digest[:8], 'big')
+        k = bisect.bisect_left(self.hashes, h)
+        if k < self.count and self.hashes[k] == h:
+            return self.ranks[k]
+        return None
+
+
+def load(path):
+    """Open a corpus built by build(), a BloomFilter or a Table."""
+    with open(path, 'rb') as f:
+        magic = f.read(len(BLOOM_MAGIC))
+        if magic not in (BLOOM_MAGIC, TABLE_MAGIC):
+            raise ValueError("%s is not a password corpus." % path)
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return (BloomFilter if magic == BLOOM_MAGIC else Table)(path, mm)
@@ -1,6 +1,10 @@
+import decimal
+
+
 def format_number(number):
     if number > 1e10:
-        return '{:e}'.format(number)
+        # Large integers can not be converted to float.
+        return '{:.6e}'.format(decimal.Decimal(number) if isinstance(number, int) else number)
     else:
         return '{:,}'.format(number)
 
@@ -27,3 +31,31 @@ def format_seconds(seconds):
         return '%d seconds' % seconds
     else:
         return '%f seconds' % seconds
+
+
+def format_brute_force(combinations, guesses_per_second):
+    if combinations < 1e300:
+        seconds = combinations / guesses_per_second
+    else:
+        seconds = combinations // int(guesses_per_second)
+    return format_seconds(seconds)
+
+
+def power_of_two(bits):
+    """Return approximate 2**bits, rounded to an integer.
+
+    Large results are computed with 53 significant bits, as an integer instead of a float, to avoid an overflow.
+    """
+    if bits < 1000:
+        return round(2**bits)
+    whole = int(bits)
+    return round(2**(bits - whole + 52)) << (whole - 52)
+
+
+def format_record(results):
+    """Return a JSON serialisable summary of results of PassCheck.check."""
+    return {
+        'entropy': round(sum(r.entropy for r in results), 4),
+        'bytes': sum(len(r.value.bytes) for r in results),
+        'patterns': [str(r.pattern) for r in results],
+    }
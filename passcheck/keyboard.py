@@ -0,0 +1,140 @@
+"""Keyboard layouts and walks over their keys.
+
+A layout is given as rows of keys, each key written as its characters without and with shift. Rows are slanted, a key
+is adjacent to keys left and right of it in its row, to keys at the same and the next column of the row above and to
+keys at the previous and the same column of the row below, where columns are counted from the first column of the first
+row.
+"""
+
+import functools
+
+
+# Rows of keys of each layout, with the column of the first key of each row.
+LAYOUTS = {
+    'qwerty': [
+        (0, '`~ 1! 2@ 3# 4$ 5% 6^ 7& 8* 9( 0) -_ =+'),
+        (1, 'qQ wW eE rR tT yY uU iI oO pP [{ ]} \\|'),
+        (1, 'aA sS dD fF gG hH jJ kK lL ;: \'"'),
+        (1, 'zZ xX cC vV bB nN mM ,< .> /?'),
+    ],
+    'azerty': [
+        (0, '² &1 é2 "3 \'4 (5 -6 è7 _8 ç9 à0 )° =+'),
+        (1, 'aA zZ eE rR tT yY uU iI oO pP ^¨ $£'),
+        (1, 'qQ sS dD fF gG hH jJ kK lL mM ù% *µ'),
+        (0, '<> wW xX cC vV bB nN ,? ;. :/ !§'),
+    ],
+    'lt': [
+        (0, '`~ ąĄ čČ ęĘ ėĖ įĮ šŠ ųŲ ūŪ „( “) -_ žŽ'),
+        (1, 'qQ wW eE rR tT yY uU iI oO pP [{ ]} \\|'),
+        (1, 'aA sS dD fF gG hH jJ kK lL ;: \'"'),
+        (1, 'zZ xX cC vV bB nN mM ,< .> /?'),
+    ],
+}
+
+# Moves from a key to its neighbours as (row, column) offsets, numbered from 1 in the adjacency table.
+DIRECTIONS = [(0, -1), (-1, 0), (-1, 1), (0, 1), (1, 0), (1, -1)]
+
+# Length of a UTF-8 encoded character by its first byte, 1 for bytes that can't start a character.
+CHAR_LENGTHS = bytes(4 if b >= 0xf0 else 3 if b >= 0xe0 else 2 if b >= 0xc0 else 1 for b in range(256))
+
+
+class Layout(object):
+    """Keys of a layout, compiled into lookup tables.
+
+    keys maps each UTF-8 encoded character to (key, shifted), where key is a number of a key. adjacency is a table of
+    size * size bytes, the byte at a * size + b is the direction of a move from key a to key b, 0 if they are not
+    adjacent.
+    """
+
+    def __init__(self, name, rows):
+        self.name = name
+        self.keys = {}
+        positions = {}
+        for row, (column, keys) in enumerate(rows):
+            for offset, chars in enumerate(keys.split()):
+                key = len(positions)
+                positions[row, column + offset] = key
+                for shifted, char in enumerate(chars):
+                    self.keys.setdefault(char.encode('utf-8'), (key, bool(shifted)))
+        self.size = len(positions)
+        self.adjacency = bytearray(self.size * self.size)
+        for (row, column), key in positions.items():
+            for direction, (dr, dc) in enumerate(DIRECTIONS, 1):
+                neighbour = positions.get((row + dr, column + dc))
+                if neighbour is not None:
+                    self.adjacency[key * self.size + neighbour] = direction
+        # Number of moves between adjacent keys, moves / size is the average number of neighbours of a key.
+        self.moves = sum(map(bool, self.adjacency))
+        self.max_char_length = max(len(char) for char in self.keys)
+        self.alphabet = {byte for char in self.keys for byte in char}
+
+    def walks(self, text):
+        """Yield a list of positions of characters of each maximal walk in text, followed by its end.
+
+        Walks are found in a single pass over text, each character of a walk is on a key adjacent to the key of the
+        previous character. Walks of a single character are yielded too.
+        """
+        keys = self.keys
+        adjacency = self.adjacency
+        size = self.size
+        positions = []
+        previous = None
+        i = 0
+        while i < len(text):
+            length = CHAR_LENGTHS[text[i]]
+            found = keys.get(text[i:i + length])
+            if found is None:
+                if positions:
+                    yield positions + [i]
+                    positions = []
+                previous = None
+                i += 1
+                continue
+            key = found[0]
+            if previous is not None and not adjacency[previous * size + key]:
+                yield positions + [i]
+                positions = []
+            positions.append(i)
+            previous = key
+            i += length
+        if positions:
+            yield positions + [i]
+
+    def walk(self, text):
+        """Return (length, turns, shifted) of a walk covering all of text, None if text is not a single walk.
+
+        length is the number of characters, turns the number of times a walk changes direction, counting the first
+        move as a turn, and shifted the number of characters typed with shift.
+        """
+        keys = self.keys
+        adjacency = self.adjacency
+        size = self.size
+        length = turns = shifted = 0
+        previous = direction = None
+        i = 0
+        while i < len(text):
+            char_length = CHAR_LENGTHS[text[i]]
+            found = keys.get(text[i:i + char_length])
+            if found is None:
+                return None
+            key, is_shifted = found
+            if previous is not None:
+                move = adjacency[previous * size + key]
+                if not move:
+                    return None
+                if move != direction:
+                    turns += 1
+                    direction = move
+            length += 1
+            shifted += is_shifted
+            previous = key
+            i += char_length
+        return length, turns, shifted
+
+
+@functools.lru_cache(maxsize=None)
+def get_layout(name):
+    """Return layout compiled from LAYOUTS, each layout is compiled once."""
+    if name not in LAYOUTS:
+        raise ValueError("Unknown keyboard layout %r, expected one of: %s." % (name, ', '.join(sorted(LAYOUTS))))
+    return Layout(name, LAYOUTS[name])
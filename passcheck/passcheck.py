@@ -1,29 +1,82 @@
-import math
+import functools
+import itertools
+import multiprocessing
 import operator
 import string
+import sys
+import time
 
-from itertools import combinations
-from collections import defaultdict
+from collections import defaultdict, deque
 
+from passcheck import affix
 from passcheck import patterns as pt
+from passcheck import profiling
+from passcheck import segmentation
+from passcheck import vectorized
 from passcheck import wordlist
+from passcheck.cache import LRUCache
+from passcheck.utils import TEXT_BYTES
+
+WORDLISTS = [
+    '/usr/share/dict/cracklib-small',
+    '/usr/share/dict/words',
+]
+
+# Breached password corpus built with passcheck build-corpus.
+CORPUS = '/usr/share/passcheck/breached-passwords'
 
 
 class Value(object):
+    """Fragment buffer[start:end] of a password, its bytes are only copied out of buffer when first needed."""
+
+    __slots__ = ('buffer', 'start', 'end', '_bytes', '_unique_bytes')
 
-    def __init__(self, value: str):
-        self.bytes = value
-        self.unique_bytes = set(value)
-        self.unique_bytes_count = len(self.unique_bytes)
+    def __init__(self, buffer, start=0, end=None):
+        self.buffer = buffer
+        self.start = start
+        self.end = len(buffer) if end is None else end
+        self._bytes = None
+        self._unique_bytes = None
+
+    def __len__(self):
+        return self.end - self.start
+
+    @property
+    def bytes(self):
+        if self._bytes is None:
+            if self.start == 0 and self.end == len(self.buffer) and isinstance(self.buffer, bytes):
+                self._bytes = self.buffer
+            else:
+                self._bytes = bytes(self.buffer[self.start:self.end])
+        return self._bytes
+
+    @property
+    def unique_bytes(self):
+        if self._unique_bytes is None:
+            self._unique_bytes = set(self.bytes)
+        return self._unique_bytes
+
+    @property
+    def unique_bytes_count(self):
+        return len(self.unique_bytes)
 
 
 class Result(object):
 
-    def __init__(self, pattern, value):
+    __slots__ = ('pattern', 'value', 'entropy', '_combinations')
+
+    def __init__(self, pattern, value, entropy=None):
         self.value = value
         self.pattern = pattern
-        self.combinations = pattern.combinations(value)
-        self.entropy = math.log2(self.combinations)
+        self.entropy = pattern.entropy(value) if entropy is None else entropy
+        self._combinations = None
+
+    @property
+    def combinations(self):
+        # Can be a very large number, so it is only computed when asked for.
+        if self._combinations is None:
+            self._combinations = self.pattern.combinations(self.value)
+        return self._combinations
 
     def __repr__(self):
         return '<%s entropy=%.04f, pattern=%s>' % (repr(self.value.bytes).lstrip('b'), self.entropy, self.pattern)
@@ -38,21 +91,46 @@ class DefaultPattern(pt.Pattern):
         return True
 
     def combinations(self, value):
-        k = 256
-        n = len(value.bytes)
-        return sum(k**i for i in range(1, n + 1))
+        return pt.geometric_sum(256, len(value.bytes))
+
+    def entropy(self, value):
+        return pt.geometric_sum_log2(256, len(value.bytes))
+
+    def min_entropy(self, length):
+        return pt.geometric_sum_log2(256, length)
+
+
+def is_byte_class(pattern):
+    """Return True if pattern is matched only by checking if all bytes are in its superset."""
+    return any(
+        type(pattern).matches is cls.matches and type(pattern).combinations is cls.combinations
+        for cls in (pt.MultipleBytesPattern, pt.SingleBytePattern)
+    )
 
 
 class PassCheck(object):
 
-    def __init__(self, patterns, debug=False):
+    def __init__(self, patterns, debug=False, cache_size=0, cache_policy='lru', profile=False, max_span=None):
         self.patterns = patterns
         self.debug = debug
+        # With max_span, fragments longer than max_span bytes are not scored, except for runs of the same byte, so
+        # that long passwords are checked in linear time. 'auto' uses the longest value any pattern can match.
+        if max_span is not None and max_span != 'auto' and max_span < 1:
+            raise ValueError("max_span must be at least 1, got %r." % (max_span,))
+        self.max_span = max_span
+        # With profile, patterns are wrapped to record their calls to stats, otherwise there is no overhead.
+        self.stats = None
+        if profile:
+            self.stats = profiling.Stats(patterns)
+            self.patterns = [profiling.ProfiledPattern(p, s) for p, s in zip(patterns, self.stats.patterns)]
+        self.scanners = None
+        # Best pattern and entropy of fragments seen before, shared by all checked passwords.
+        self.cache = LRUCache(cache_size, cache_policy) if cache_size else None
 
-    def get_result(self, value):
+    def get_result(self, value, patterns=None):
         results = []
         value = Value(value.encode()) if isinstance(value, str) else Value(value)
-        for pattern in self.patterns:
+        for pattern in self.patterns if patterns is None else patterns:
             if pattern.matches(value):
                 result = Result(pattern, value)
                 results.append((result.entropy, result))
@@ -62,30 +140,546 @@ class PassCheck(object):
         else:
             return Result(DefaultPattern(), value)
 
-    def check(self, password):
-        tree = defaultdict(list)
-        for i, j in combinations(range(len(password) + 1), 2):
-            value = password[i:j]
-            result = self.get_result(value)
-            length = len(result.value.bytes)
-            entropy = result.entropy / length + 1 / length
-            tree[i].append((j, entropy, result))
-        return next(self.compositions(tree))
-
-    def compositions(self, tree, i=0):
+    def prepare(self):
+        """Prepare lookup tables used by check(), done once on first check."""
+        if self.scanners is not None:
+            return
+        scanners = {}
+        for pattern in self.patterns:
+            if pattern.scanner is not None:
+                scanners.setdefault(id(pattern.scanner), (pattern.scanner, []))[1].append(pattern)
+        self.scanners = list(scanners.values())
+        self.unscanned = [p for p in self.patterns if p.scanner is None]
+        self.order = {p: i for i, p in enumerate(self.patterns)}
+
+        # Patterns are matched using a bit mask for each byte value, with a bit for each pattern whose alphabet
+        # contains that byte. A fragment can only match a pattern if the bit is set for all its bytes. Byte class
+        # patterns match if it is, single byte patterns also need all bytes of the fragment to be the same.
+        self.bits = {}
+        self.classes = set()
+        self.single = 0
+        self.masks = [0] * 256
+        for pattern in self.patterns:
+            alphabet = pattern.alphabet
+            if not pattern.binary:
+                alphabet = TEXT_BYTES if alphabet is None else TEXT_BYTES & set(alphabet)
+            if alphabet is None:
+                continue
+            bit = 1 << len(self.bits)
+            self.bits[pattern] = bit
+            for byte in alphabet:
+                self.masks[byte] |= bit
+            if is_byte_class(profiling.unwrap(pattern)):
+                self.classes.add(pattern)
+                if isinstance(profiling.unwrap(pattern), pt.SingleBytePattern):
+                    self.single |= bit
+        self.class_entropy = {}
+        self.default = DefaultPattern()
+
+        if self.max_span == 'auto':
+            self.span = max((p.max_length for p in self.patterns if p.max_length is not None), default=1)
+        else:
+            self.span = self.max_span
+        self.min_entropies = {}
+        self.fragment_bounds = {}
+
+        # Patterns without a scanner to check fragments of each length, fragments longer than all min_length and
+        # max_length of these patterns use the last list.
+        limit = max(
+            [p.min_length for p in self.unscanned] + [p.max_length for p in self.unscanned if p.max_length is not None],
+            default=0,
+        ) + 1
+        self.plan = [
+            [p for p in self.unscanned if p.min_length <= n and (p.max_length is None or n <= p.max_length)]
+            for n in range(limit + 1)
+        ]
+
+        # Byte class patterns scored for batches of passwords by vectorized.score_classes(), with masks of their bits
+        # renumbered in order of patterns, and patterns left to be matched one fragment at a time.
+        self.class_patterns = [p for p in self.patterns if p in self.classes]
+        self.class_masks = [0] * 256
+        self.class_single = 0
+        for k, pattern in enumerate(self.class_patterns):
+            bit = self.bits[pattern]
+            for byte in range(256):
+                if self.masks[byte] & bit:
+                    self.class_masks[byte] |= 1 << k
+            if self.single & bit:
+                self.class_single |= 1 << k
+        self.other_plan = [[p for p in plan if p not in self.classes] for plan in self.plan]
+
+    def get_plan(self, length):
+        """Return patterns without a scanner that can match a fragment of given length."""
+        return self.plan[min(length, len(self.plan) - 1)]
+
+    def scan(self, password, end=None):
+        """Find fragments of password matched by scanners, returns a dict of (i, j) to a list of candidate patterns.
+
+        If end is given, only fragments ending at end are returned.
+        """
+        self.prepare()
+        if self.stats is not None:
+            start = time.perf_counter()
+        found = defaultdict(list)
+        for scanner, patterns in self.scanners:
+            for i, j in scanner.find(password):
+                if end is None or j == end:
+                    found[i, j].extend(patterns)
+        for (i, j), patterns in found.items():
+            found[i, j] = sorted(self.get_plan(j - i) + patterns, key=self.order.__getitem__)
+        if self.stats is not None:
+            self.stats.scan_time += time.perf_counter() - start
+        return found
+
+    def get_fragment_score(self, value, patterns, mask, same, best=None):
+        """Same as get_result, but returns (pattern, entropy) and patterns are filtered using mask of alphabets common
+        to all bytes of value.
+
+        Byte class patterns are matched using the mask alone. same tells if all bytes of value are the same. best is
+        (pattern, entropy) of a pattern already scored, when byte class patterns are scored in batches.
+        """
+        length = len(value)
+        bits = self.bits
+        for pattern in patterns:
+            bit = bits.get(pattern)
+            if bit is not None and not mask & bit:
+                continue
+            if pattern not in self.classes:
+                if pattern.matches(value):
+                    entropy = pattern.entropy(value)
+                    if best is None or entropy < best[1] or (
+                        entropy == best[1] and self.order[pattern] < self.order[best[0]]
+                    ):
+                        best = (pattern, entropy)
+            elif not self.single & bit or (same and length > 1):
+                key = (bit, length)
+                if key not in self.class_entropy:
+                    self.class_entropy[key] = pattern.entropy(value)
+                if best is None or self.class_entropy[key] < best[1]:
+                    best = (pattern, self.class_entropy[key])
+        if best is None:
+            return self.default, self.get_min_entropy(self.default, length)
+        return best
+
+    def get_min_entropy(self, pattern, length):
+        key = (pattern, length)
+        if key not in self.min_entropies:
+            self.min_entropies[key] = pattern.min_entropy(length)
+        return self.min_entropies[key]
+
+    def get_fragment_bound(self, length, patterns, mask, same):
+        """Return a lower bound of entropy of a fragment, without matching it against patterns.
+
+        Arguments are the same as in get_fragment_score, except length of the fragment is given instead of its value.
+        """
+        bound = self.get_min_entropy(self.default, length)
+        for pattern in patterns:
+            bit = self.bits.get(pattern)
+            if bit is not None and not mask & bit:
+                continue
+            if pattern in self.classes and self.single & bit and not (same and length > 1):
+                continue
+            bound = min(bound, self.get_min_entropy(pattern, length))
+        return bound
+
+    def get_scores(self, password):
+        """Yield (i, j, entropy, (pattern, entropy)) for all fragments of password."""
+        found = self.scan(password)
+        masks = self.masks
+        for i in range(len(password)):
+            mask = -1
+            same = True
+            for j in range(i + 1, len(password) + 1):
+                byte = password[j - 1]
+                mask &= masks[byte]
+                same = same and byte == password[i]
+                score = self.get_score(password, i, j, found, mask, same)
+                yield i, j, score[1], score
+
+    def get_class_entropy(self, k, length):
+        """Return entropy of a fragment of given length matched by byte class pattern number k, see prepare()."""
+        pattern = self.class_patterns[k]
+        if length < pattern.min_length or (pattern.max_length is not None and length > pattern.max_length):
+            return float('inf')
+        key = (self.bits[pattern], length)
+        if key not in self.class_entropy:
+            self.class_entropy[key] = pattern.entropy(Value(bytes(length)))
+        return self.class_entropy[key]
+
+    def get_batch_scores(self, password, entropies, indexes):
+        """Same as get_scores, with entropies and indexes of the best byte class pattern of each fragment returned by
+        vectorized.score_classes().
+
+        Fragments which can't match other patterns are not matched one by one at all.
+        """
+        found = self.scan(password)
+        masks = self.masks
+        classes = self.class_patterns
+        other_plan = self.other_plan
+        for i in range(len(password)):
+            mask = -1
+            same = True
+            row = entropies[i]
+            index = indexes[i]
+            for j in range(i + 1, len(password) + 1):
+                byte = password[j - 1]
+                mask &= masks[byte]
+                same = same and byte == password[i]
+                k = index[j - i - 1]
+                best = None if k < 0 else (classes[k], row[j - i - 1])
+                patterns = found.get((i, j))
+                if patterns is None:
+                    patterns = other_plan[min(j - i, len(other_plan) - 1)]
+                else:
+                    patterns = [p for p in patterns if p not in self.classes]
+                if not patterns:
+                    score = best or (self.default, self.get_min_entropy(self.default, j - i))
+                else:
+                    value = Value(password, i, j)
+                    score = None if self.cache is None else self.cache.get(value.bytes)
+                    if score is None:
+                        score = self.get_fragment_score(value, patterns, mask, same, best)
+                        if self.cache is not None:
+                            self.cache.put(value.bytes, score)
+                yield i, j, score[1], score
+
+    def get_results(self, password):
+        """Yield (i, j, result) for all fragments of password."""
+        for i, j, entropy, (pattern, _) in self.get_scores(password):
+            yield i, j, Result(pattern, Value(password, i, j), entropy)
+
+    def get_score(self, password, i, j, found, mask, same):
+        """Return (pattern, entropy) of fragment password[i:j].
+
+        found is returned by scan(), mask and same are the same as in get_fragment_score.
+        """
+        value = Value(password, i, j)
+        cached = None if self.cache is None else self.cache.get(value.bytes)
+        if cached is not None:
+            return cached
+        patterns = found.get((i, j))
+        if patterns is None:
+            patterns = self.get_plan(j - i)
+        score = self.get_fragment_score(value, patterns, mask, same)
+        if self.cache is not None:
+            self.cache.put(value.bytes, score)
+        return score
+
+    def compose(self, password, path):
+        """Return results of (i, j, (pattern, entropy)) fragments of password on path."""
+        return tuple(Result(pattern, Value(password, i, j), entropy) for i, j, (pattern, entropy) in path)
+
+    def get_edges(self, password, j, found, run=0, run_end=True):
+        """Return a list of (i, entropy, (pattern, entropy)) of fragments of password ending at j, ordered by i.
+
+        found is returned by scan(). Without max_span, all fragments are returned. With max_span, fragments up to
+        max_span bytes long are returned, and out of longer fragments of the run of bytes equal to password[j - 1],
+        which starts at run, the one starting at run and, if the run ends at j, all that end at j.
+        """
+        start = 0 if self.span is None else max(0, j - self.span)
+        masks = self.masks
+        edges = []
+        mask = -1
+        same = True
+        for i in range(j - 1, start - 1, -1):
+            byte = password[i]
+            mask &= masks[byte]
+            same = same and byte == password[j - 1]
+            score = self.get_score(password, i, j, found, mask, same)
+            edges.append((i, score[1], score))
+        if start > run:
+            mask = masks[password[j - 1]]
+            for i in range(start - 1 if run_end else run, run - 1, -1):
+                score = self.get_score(password, i, j, found, mask, True)
+                edges.append((i, score[1], score))
+        edges.reverse()
+        return edges
+
+    def get_windowed_edges(self, password):
+        """Yield (j, edges) for each end position of fragments of password scored with max_span, see get_edges()."""
+        found = self.scan(password)
+        run = 0
+        for j in range(1, len(password) + 1):
+            if j > 1 and password[j - 1] != password[j - 2]:
+                run = j - 1
+            run_end = j == len(password) or password[j] != password[j - 1]
+            yield j, self.get_edges(password, j, found, run, run_end)
+
+    def check_windowed(self, password):
+        """Same as check(), with fragments limited by max_span, keeps a single result for each position."""
+        costs = [0]
+        back = [None]
+        for j, edges in self.get_windowed_edges(password):
+            segmentation.extend(costs, back, edges)
+        return self.compose(password, segmentation.backtrack(back))
+
+    def check_k_best(self, password, k):
+        """Return a list of up to k compositions of password with the lowest cost, the first one is check(password).
+        """
+        if k < 1:
+            raise ValueError("k must be at least 1, got %r." % (k,))
+        if self.span is None:
+            edges = self.get_scores(password)
+        else:
+            edges = (
+                (i, j, entropy, score) for j, edges in self.get_windowed_edges(password) for i, entropy, score in edges
+            )
+        return [self.compose(password, path) for _, path in segmentation.k_best(edges, len(password), k)]
+
+    def check(self, password, k=None):
+        """Return results of the best composition of password.
+
+        With k, returns a list of up to k best compositions instead, see check_k_best().
+        """
+        password = password.encode() if isinstance(password, str) else password
+        self.prepare()
+        if k is not None:
+            return self.check_k_best(password, k)
+        if self.span is not None:
+            return self.check_windowed(password)
+        if self.stats is not None:
+            return self.check_profiled(password)
         if self.debug:
+            tree = defaultdict(list)
+            for i, j, result in self.get_results(password):
+                tree[i].append((j, result.entropy, result))
+            self.print_tree(tree)
+            return segmentation.best(tree, len(password))
+        # Only the best fragment ending at each position is kept while fragments are scored.
+        return self.compose(password, segmentation.shortest(self.get_scores(password), len(password)))
+
+    def check_batch(self, passwords):
+        """Return a list of results of each of passwords, same as check(), with byte class patterns of all fragments of
+        all passwords scored at once.
+
+        Byte class patterns are scored in bulk with NumPy, without it, or when check() does not score all fragments,
+        passwords are checked one by one.
+        """
+        self.prepare()
+        passwords = [p.encode() if isinstance(p, str) else p for p in passwords]
+        if (
+            vectorized.get_numpy() is None or self.span is not None or self.stats is not None or self.debug or
+            len(self.class_patterns) > vectorized.MAX_CLASSES
+        ):
+            return [self.check(password) for password in passwords]
+        results = []
+        for start in range(0, len(passwords), vectorized.BATCH_SIZE):
+            batch = passwords[start:start + vectorized.BATCH_SIZE]
+            tables = iter(vectorized.score_classes(
+                [p for p in batch if len(p) <= vectorized.MAX_LENGTH],
+                len(self.class_patterns), self.class_masks, self.class_single, self.get_class_entropy,
+            ))
+            for password in batch:
+                if len(password) > vectorized.MAX_LENGTH:
+                    results.append(self.check(password))
+                else:
+                    entropies, indexes = next(tables)
+                    scores = self.get_batch_scores(password, entropies.tolist(), indexes.tolist())
+                    results.append(self.compose(password, segmentation.shortest(scores, len(password))))
+        return results
+
+    def meets(self, password, min_bits):
+        """Return True if entropy of password, as composed by check(), is at least min_bits.
+
+        The password is only checked in full if bounds of its entropy do not answer it. A single fragment covering the
+        whole password proves it is too weak, if its entropy is lower than min_bits, because the best composition
+        costs no more and has at least one fragment. Lowest entropy of any composition, using lower bounds of entropy
+        of patterns each fragment can match, proves it is strong enough. With max_span, passwords longer than it are
+        always checked in full, which takes linear time anyway.
+        """
+        password = password.encode() if isinstance(password, str) else password
+        n = len(password)
+        if not n:
+            return min_bits <= 0
+        self.prepare()
+        if self.span is not None and n > self.span:
+            return sum(r.entropy for r in self.check(password)) >= min_bits
+        found = self.scan(password)
+        masks = self.masks
+
+        mask = -1
+        for byte in password:
+            mask &= masks[byte]
+        same = password.count(password[:1]) == n
+        if self.get_score(password, 0, n, found, mask, same)[1] < min_bits:
+            return False
+
+        bounds = [0] + [float('inf')] * n
+        for i in range(n):
+            mask = -1
+            same = True
+            for j in range(i + 1, n + 1):
+                byte = password[j - 1]
+                mask &= masks[byte]
+                same = same and byte == password[i]
+                patterns = found.get((i, j))
+                if patterns is None:
+                    # Bounds of fragments not found by scanners only depend on these, so they are computed once.
+                    key = (j - i, mask, same)
+                    if key not in self.fragment_bounds:
+                        self.fragment_bounds[key] = self.get_fragment_bound(j - i, self.get_plan(j - i), mask, same)
+                    bound = bounds[i] + self.fragment_bounds[key]
+                else:
+                    bound = bounds[i] + self.get_fragment_bound(j - i, patterns, mask, same)
+                if bound < bounds[j]:
+                    bounds[j] = bound
+        if bounds[n] >= min_bits:
+            return True
+
+        return sum(r.entropy for r in self.check(password)) >= min_bits
+
+    def session(self):
+        """Return a Session, scoring a password as it is typed."""
+        self.prepare()
+        return Session(self)
+
+    def check_profiled(self, password):
+        stats = self.stats
+        stats.passwords += 1
+        stats.fragments += len(password) * (len(password) + 1) // 2
+        start = time.perf_counter()
+        tree = defaultdict(list)
+        for i, j, result in self.get_results(password):
+            tree[i].append((j, result.entropy, result))
+        stats.scoring_time += time.perf_counter() - start
+        start = time.perf_counter()
+        results = segmentation.best(tree, len(password))
+        stats.segmentation_time += time.perf_counter() - start
+        return results
+
+    def load(self):
+        """Load data of all patterns, instead of loading it on first use."""
+        for pattern in self.patterns:
+            pattern.load()
+        self.prepare()
+
+    def check_many(self, passwords, workers=None, chunksize=64):
+        """Check each of passwords, yields results in the same order.
+
+        Passwords are checked in chunks with check_batch(). With more than one worker, chunks are checked by a pool of
+        processes forked after all pattern data is loaded, so that the data is shared between processes.
+        """
+        if not workers or workers == 1:
+            passwords = iter(passwords)
+            for chunk in iter(lambda: list(itertools.islice(passwords, chunksize)), []):
+                yield from self.check_batch(chunk)
+            return
+
+        global _worker_passcheck
+        self.load()
+        _worker_passcheck = self
+        context = multiprocessing.get_context('fork')
+        with context.Pool(workers, initializer=_init_worker) as pool:
+            pending = deque()
+            passwords = iter(passwords)
+            chunks = iter(lambda: list(itertools.islice(passwords, chunksize)), [])
+            for chunk in chunks:
+                pending.append((chunk, pool.apply_async(_check_chunk, (chunk,))))
+                # Do not read more passwords, than workers can check.
+                if len(pending) > 2 * workers:
+                    yield from self._load_chunk(*pending.popleft())
+            while pending:
+                yield from self._load_chunk(*pending.popleft())
+
+    def _load_chunk(self, passwords, pending):
+        chunk, stats = pending.get()
+        if stats is not None:
+            self.stats.add(stats)
+        for password, composition in zip(passwords, chunk):
+            password = password.encode() if isinstance(password, str) else password
+            results = []
+            i = 0
+            for j, k in composition:
+                value = Value(password, i, j)
+                results.append(Result(DefaultPattern() if k is None else self.patterns[k], value))
+                i = j
+            yield tuple(results)
+
+    def print_tree(self, tree, out=None):
+        # Goes to stderr by default, so that it does not get mixed with records printed by passcheck -i.
+        out = sys.stderr if out is None else out
+        for i in sorted(tree):
             for _, e, r in sorted(tree[i], key=operator.itemgetter(1)):
-                print('%.04f  %s' % (e, r))
-            print('-----')
-        for j, entropy, result in sorted(tree[i], key=operator.itemgetter(1)):
-            if j in tree:
-                for row in self.compositions(tree, j):
-                    yield (result,) + row
-            else:
-                yield (result,)
+                print('%.04f  %s' % (e, r), file=out)
+            print('-----', file=out)
+
+
+class Session(object):
+    """Password typed byte by byte, scored incrementally.
+
+    Each appended byte only scores fragments ending at it and extends the lowest cost paths found for shorter
+    prefixes, giving the same results as checking the whole password with PassCheck.check(), also with max_span.
+    """
+
+    def __init__(self, passcheck):
+        self.passcheck = passcheck
+        self.password = bytearray()
+        # Lowest cost of a path covering the first j bytes and (i, result) of the last fragment on that path.
+        self.costs = [0]
+        self.back = [None]
+
+    def append(self, data):
+        """Append a byte, or all bytes of data, returns the best composition of the password."""
+        if isinstance(data, str):
+            data = data.encode()
+        for byte in [data] if isinstance(data, int) else data:
+            self.password.append(byte)
+            self.extend()
+        return self.composition()
+
+    def backspace(self, count=1):
+        """Remove last count bytes, returns the best composition of the password."""
+        for _ in range(min(count, len(self.password))):
+            self.password.pop()
+            self.costs.pop()
+            self.back.pop()
+        return self.composition()
+
+    def extend(self):
+        password = bytes(self.password)
+        j = len(password)
+        found = self.passcheck.scan(password, end=j)
+        run = j - 1
+        while run and password[run - 1] == password[j - 1]:
+            run -= 1
+        segmentation.extend(self.costs, self.back, self.passcheck.get_edges(password, j, found, run))
+
+    def composition(self):
+        return self.passcheck.compose(bytes(self.password), segmentation.backtrack(self.back))
+
 
+# PassCheck used by worker processes of PassCheck.check_many, inherited from the parent process.
+_worker_passcheck = None
 
-def get_default_passcheck(debug=False):
+
+def _init_worker():
+    # Stats are copied from the parent process, only stats of the worker itself are sent back.
+    if _worker_passcheck.stats is not None:
+        _worker_passcheck.stats.take()
+
+
+def _check_chunk(passwords):
+    # Patterns can hold large amounts of data, so only positions and pattern indexes are sent back, with stats of
+    # checking the chunk when profiling.
+    order = _worker_passcheck.order
+    chunk = []
+    for results in _worker_passcheck.check_batch(passwords):
+        composition = []
+        j = 0
+        for result in results:
+            j += len(result.value.bytes)
+            composition.append((j, order.get(result.pattern)))
+        chunk.append(composition)
+    stats = _worker_passcheck.stats
+    return chunk, None if stats is None else stats.take()
+
+
+@functools.lru_cache(maxsize=None)
+def get_default_passcheck(debug=False, cache_size=0, profile=False, max_span=None):
+    """Return PassCheck with default patterns, shared by the whole process.
+
+    Patterns load their data on first use, patterns whose data files do not exist are left out.
+    """
     digits = set(string.digits.encode())
     hexdigits_lowercase = set(string.hexdigits.lower().encode())
     hexdigits_uppercase = set(string.hexdigits.upper().encode())
@@ -95,26 +689,36 @@ def get_default_passcheck(debug=False):
     punctuation = set(string.punctuation.encode())
     allbytes = set(range(256))
 
-    cracklib_words = wordlist.load('/usr/share/dict/cracklib-small', required=False)
-    unix_words = wordlist.load('/usr/share/dict/words', required=False)
+    # Both wordlists share a single copy of words they have in common and a single lookup of each fragment.
+    lexicon = wordlist.Lexicon(WORDLISTS)
+
+    patterns = [
+        pt.HunspellPattern('hunspell dictionary (lt)', '/usr/share/hunspell/lt_LT.dic', '/usr/share/hunspell/lt_LT.aff', required=False, native=True),  # noqa
+        pt.HunspellPattern('hunspell dictionary (us)', '/usr/share/hunspell/en_US.dic', '/usr/share/hunspell/en_US.aff', required=False, native=True),  # noqa
+
+        pt.LexiconPattern('cracklib dictionary', lexicon, 0),
+        pt.TitleCaseLexiconPattern('cracklib dictionary (title)', lexicon, 0),
+        pt.CaseInsensitiveLexiconPattern('cracklib dictionary (case-insensitive)', lexicon, 0),
 
-    return PassCheck([
-        pt.HunspellPattern('hunspell dictionary (lt)', '/usr/share/hunspell/lt_LT.dic', '/usr/share/hunspell/lt_LT.aff', required=False),  # noqa
-        pt.HunspellPattern('hunspell dictionary (us)', '/usr/share/hunspell/en_US.dic', '/usr/share/hunspell/en_US.aff', required=False),  # noqa
+        pt.LexiconPattern('unix words', lexicon, 1),
+        pt.TitleCaseLexiconPattern('unix words (title)', lexicon, 1),
+        pt.CaseInsensitiveLexiconPattern('unix words (case insensitive)', lexicon, 1),
 
-        pt.DictPattern('cracklib dictionary', cracklib_words),
-        pt.TitleCaseDictPattern('cracklib dictionary (title)', cracklib_words),
-        pt.CaseInsensitiveDictPattern('cracklib dictionary (case-insensitive)', cracklib_words),
+        pt.SubstitutionDictPattern('cracklib dictionary or unix words (substitutions)', lexicon),
+        pt.SubstitutionDictPattern('hunspell dictionary (lt) (substitutions)', affix.LazyDictionary('/usr/share/hunspell/lt_LT.dic', '/usr/share/hunspell/lt_LT.aff')),  # noqa
+        pt.SubstitutionDictPattern('hunspell dictionary (us) (substitutions)', affix.LazyDictionary('/usr/share/hunspell/en_US.dic', '/usr/share/hunspell/en_US.aff')),  # noqa
 
-        pt.DictPattern('unix words', unix_words),
-        pt.TitleCaseDictPattern('unix words (title)', unix_words),
-        pt.CaseInsensitiveDictPattern('unix words (case insensitive)', unix_words),
+        pt.BreachedCorpusPattern('breached passwords', CORPUS, ranked=True),
 
         pt.SequencePatter('123... sequence', string.digits),
         pt.SequencePatter('abc... sequence', string.ascii_lowercase),
         pt.SequencePatter('ABC... sequence', string.ascii_uppercase),
         pt.SequencePatter('abc...ABC.. sequence', string.ascii_letters),
 
+        pt.KeyboardWalkPattern('keyboard walk (qwerty)', 'qwerty'),
+        pt.KeyboardWalkPattern('keyboard walk (azerty)', 'azerty'),
+        pt.KeyboardWalkPattern('keyboard walk (lt)', 'lt'),
+
         pt.SingleBytePattern('single digit repeated', digits),
         pt.SingleBytePattern('single lower case letter repeated', lowercase),
         pt.SingleBytePattern('single upper case letter repeated', uppercase),
@@ -135,4 +739,7 @@ def get_default_passcheck(debug=False):
         pt.MultipleBytesPattern('lower or upper case letters and punctuation', letters | punctuation),
         pt.MultipleBytesPattern('lower or upper case letters, digits and punctuation', letters | digits | punctuation),
         pt.MultipleBytesPattern('sequence of bytes', allbytes),
-    ], debug=debug)
+    ]
+
+    patterns = [p for p in patterns if p.available()]
+    return PassCheck(patterns, debug=debug, cache_size=cache_size, profile=profile, max_span=max_span)
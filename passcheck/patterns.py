@@ -1,9 +1,45 @@
+import fractions
+import functools
+import hashlib
+import math
 import os.path
 
+from passcheck import affix
+from passcheck import automaton
+from passcheck import cache
+from passcheck import corpus
+from passcheck import keyboard
+from passcheck import substitutions
+from passcheck import wordlist
 from passcheck.utils import is_binary
 
 
+def geometric_sum(k, n):
+    """Return sum(k**i for i in range(1, n + 1)), the number of sequences of 1 to n symbols out of k."""
+    return n if k == 1 else (k**(n + 1) - k) // (k - 1)
+
+
+def geometric_sum_log2(k, n):
+    """Return log2(geometric_sum(k, n)), without computing the sum itself."""
+    if k == 1:
+        return math.log2(n)
+    # geometric_sum(k, n) = k**n * (1 - k**-n) / (1 - 1 / k)
+    return n * math.log2(k) + math.log2((1 - k**-float(n)) / (1 - 1 / k))
+
+
 class Pattern(object):
+    # Patterns with a scanner are only checked against fragments found by scanner.find(password), instead of all
+    # fragments of a password. Patterns sharing the same scanner are checked after a single scan.
+    scanner = None
+
+    # Constraints on values a pattern can match, PassCheck does not check a pattern against values outside them. These
+    # defaults allow any value, subclasses narrow them down where matches() can never be true otherwise: min_length and
+    # max_length bound the length of a value, with None for no limit, alphabet is a set of bytes a value can consist
+    # of, with None for any byte and binary tells if values with bytes that do not appear in text can match.
+    min_length = 1
+    max_length = None
+    alphabet = None
+    binary = True
 
     def __init__(self, title):
         self.title = title
@@ -11,6 +47,21 @@ class Pattern(object):
     def __str__(self):
         return self.title
 
+    def available(self):
+        """Return False if data needed by this pattern is missing, so the pattern would never match."""
+        return True
+
+    def load(self):
+        """Load data needed by this pattern, otherwise it is loaded on first use."""
+
+    def entropy(self, value):
+        """Return log2 of combinations, patterns can compute it without computing combinations first."""
+        return math.log2(self.combinations(value))
+
+    def min_entropy(self, length):
+        """Return a lower bound of entropy of any value of given length matched by this pattern."""
+        return 0
+
 
 class MultipleBytesPattern(Pattern):
 
@@ -18,16 +69,25 @@ class MultipleBytesPattern(Pattern):
         super().__init__(title)
         self.superset = superset
 
+    @property
+    def alphabet(self):
+        return self.superset
+
     def matches(self, value):
         return value.unique_bytes <= self.superset
 
     def combinations(self, value):
-        k = len(self.superset)
-        n = len(value.bytes)
-        return sum(k**i for i in range(1, n + 1))
+        return geometric_sum(len(self.superset), len(value.bytes))
+
+    def entropy(self, value):
+        return geometric_sum_log2(len(self.superset), len(value.bytes))
+
+    def min_entropy(self, length):
+        return geometric_sum_log2(len(self.superset), length)
 
 
 class SingleBytePattern(MultipleBytesPattern):
+    min_length = 2
 
     def matches(self, value):
         return len(value.bytes) > 1 and value.unique_bytes_count == 1 and super().matches(value)
@@ -37,20 +97,54 @@ class SingleBytePattern(MultipleBytesPattern):
         n = len(value.bytes)
         return k * n
 
+    def entropy(self, value):
+        return math.log2(self.combinations(value))
+
+    def min_entropy(self, length):
+        return math.log2(len(self.superset) * length)
+
 
 class DictPattern(Pattern):
+    min_length = 2
 
     def __init__(self, title, words, ranked=False):
         super().__init__(title)
         self.words = words
         self.ranked = ranked
 
+    def available(self):
+        path = getattr(self.words, 'path', None)
+        return path is None or os.path.exists(path)
+
+    def load(self):
+        if hasattr(self.words, 'load'):
+            self.words.load()
+        # Builds the automaton, if words don't have a scanner of their own.
+        self.scanner.find(b'')
+
+    @property
+    def scanner(self):
+        # Compiled wordlists can search for words themselves.
+        return self.words if hasattr(self.words, 'find') else self.automaton
+
+    @functools.cached_property
+    def automaton(self):
+        return automaton.Automaton(self.words)
+
+    @functools.cached_property
+    def max_length(self):
+        return wordlist.get_max_length(self.words)
+
     def matches(self, value):
         return len(value.bytes) > 1 and value.bytes in self.words
 
     def combinations(self, value):
         return self.words[value.bytes] if self.ranked else len(self.words)
 
+    def min_entropy(self, length):
+        # The best rank is 1.
+        return 0 if self.ranked else math.log2(max(len(self.words), 1))
+
 
 class TitleCaseDictPattern(DictPattern):
 
@@ -64,38 +158,257 @@ class TitleCaseDictPattern(DictPattern):
     def combinations(self, value):
         return super().combinations(value) * 2
 
+    def min_entropy(self, length):
+        return super().min_entropy(length) + 1
+
 
 class CaseInsensitiveDictPattern(DictPattern):
 
+    def __init__(self, title, words, ranked=False):
+        super().__init__(title, words, ranked)
+        self.total = None
+        self.table = None
+
+    def load(self):
+        super().load()
+        if self.total is None:
+            self.total, self.table = wordlist.get_case_insensitive_combinations(self.words, self.ranked)
+
     def matches(self, value):
         return len(value.bytes) > 1 and value.bytes.lower() in self.words
 
     def combinations(self, value):
-        c = 0
-        for w in self.words:
-            c += 2**len(w)
-            if self.ranked and w == value.bytes.lower():
-                return c
-        return c
+        if self.total is None:
+            self.load()
+        return self.table.get(value.bytes.lower(), self.total) if self.ranked else self.total
+
+    def min_entropy(self, length):
+        if self.ranked:
+            return 0
+        self.load()
+        return math.log2(max(self.total, 1))
+
+
+class SubstitutionDictPattern(Pattern):
+    """Words with some of their letters substituted, like p@ssw0rd, in lower or title case.
+
+    Substitutions are given by table, see substitutions.SUBSTITUTIONS. A value is compared to at most ambiguity words
+    with the same normal form.
+    """
+    min_length = 2
+
+    def __init__(self, title, words, table=None, ranked=False, ambiguity=8):
+        super().__init__(title)
+        self.words = words
+        self.substitutions = substitutions.Substitutions(table)
+        self.ranked = ranked
+        self.ambiguity = ambiguity
+        self.index = None
+        self.last = (None, None)
+
+    def available(self):
+        if hasattr(self.words, 'available'):
+            return self.words.available()
+        path = getattr(self.words, 'path', None)
+        return path is None or os.path.exists(path)
+
+    def load(self):
+        # Index is built from loaded words, whose path names its cache file.
+        words = self.words.load() if hasattr(self.words, 'load') else self.words
+        if self.index is None:
+            self.index = wordlist.get_normalised_index(words, self.substitutions, self.ambiguity)
+
+    @functools.cached_property
+    def max_length(self):
+        return wordlist.get_max_length(self.words)
+
+    def get_match(self, value):
+        """Return (word, substitutions) of value, None if value is not a substituted word."""
+        last = self.last
+        if last[0] is value:
+            return last[1]
+        match = None
+        v = value.bytes
+        lower = v.lower()
+        if len(v) > 1 and value.unique_bytes & self.substitutions.sources and v[1:] == lower[1:]:
+            if self.index is None:
+                self.load()
+            for word in self.index.get(self.substitutions.normalise(lower), ()):
+                found = self.substitutions.substituted(lower, word)
+                if found:
+                    match = (word, found)
+                    break
+        self.last = (value, match)
+        return match
+
+    def matches(self, value):
+        return self.get_match(value) is not None
+
+    def combinations(self, value):
+        word, found = self.get_match(value)
+        combinations = self.get_rank(word) if self.ranked else len(self.words)
+        combinations *= self.substitutions.variations(value.bytes.lower(), found)
+        return combinations * 2 if value.bytes[:1] != value.bytes[:1].lower() else combinations
+
+    def get_rank(self, word):
+        # Lexicons map words to their index, not to their rank.
+        return self.words.get_rank(word) if hasattr(self.words, 'get_rank') else self.words[word]
+
+    def min_entropy(self, length):
+        # There are at least two ways to substitute a letter.
+        return 1 if self.ranked else math.log2(max(len(self.words), 1)) + 1
+
+
+class LexiconPattern(Pattern):
+    """Same as DictPattern, for words of wordlist number source of a lexicon."""
+    min_length = 2
+
+    def __init__(self, title, lexicon, source, ranked=False):
+        super().__init__(title)
+        self.lexicon = lexicon
+        self.source = source
+        self.ranked = ranked
+
+    def available(self):
+        return os.path.exists(self.lexicon.paths[self.source])
+
+    def load(self):
+        self.lexicon.load()
+
+    @property
+    def scanner(self):
+        return self.lexicon
+
+    @property
+    def max_length(self):
+        return self.lexicon.max_length
+
+    def get_index(self, value):
+        """Return index of value in lexicon, if it is a word of source in any case."""
+        if len(value) <= 1:
+            return None
+        index = self.lexicon.lookup(value)
+        if index is None or not self.lexicon.ranks[self.source][index]:
+            return None
+        return index
+
+    def matches(self, value):
+        return self.get_index(value) is not None and value.bytes == value.bytes.lower()
+
+    def combinations(self, value):
+        if self.ranked:
+            return self.lexicon.ranks[self.source][self.get_index(value)]
+        self.lexicon.load()
+        return self.lexicon.counts[self.source]
+
+    def min_entropy(self, length):
+        self.lexicon.load()
+        return 0 if self.ranked else math.log2(max(self.lexicon.counts[self.source], 1))
+
+
+class TitleCaseLexiconPattern(LexiconPattern):
+
+    def matches(self, value):
+        return self.get_index(value) is not None and value.bytes[1:] == value.bytes[1:].lower()
+
+    def combinations(self, value):
+        return super().combinations(value) * 2
+
+    def min_entropy(self, length):
+        return super().min_entropy(length) + 1
+
+
+class CaseInsensitiveLexiconPattern(LexiconPattern):
+
+    def matches(self, value):
+        return self.get_index(value) is not None
+
+    def combinations(self, value):
+        if self.ranked:
+            return self.lexicon.get_case_insensitive_table(self.source)[self.get_index(value)]
+        self.lexicon.load()
+        return self.lexicon.totals[self.source]
+
+    def min_entropy(self, length):
+        if self.ranked:
+            return 0
+        self.lexicon.load()
+        return math.log2(max(self.lexicon.totals[self.source], 1))
 
 
 class HunspellPattern(Pattern):
+    min_length = 2
+    binary = False
 
-    def __init__(self, title, dpath, apath, required=True):
+    def __init__(self, title, dpath, apath, required=True, native=False):
         super().__init__(title)
 
         self.dpath = dpath
         self.apath = apath
 
-        hunspell = self.import_hunspell(required)
-
-        if required or (os.path.exists(dpath) and os.path.exists(apath)):
-            self.hs = hunspell.HunSpell(dpath, apath)
-            with open(dpath, encoding=self.hs.get_dic_encoding()) as f:
+        # Native patterns expand the dictionary into a wordlist, instead of spelling each value with hunspell, which is
+        # only used if affix rules of the dictionary are not supported.
+        self.native = native
+        self.required = required
+        self.hunspell = None if native else self.import_hunspell(required)
+        self.loaded = False
+
+        self.words = None
+        self.hs = None
+        self.word_count = 0
+        self.case_insensitive_count = 0
+
+        if required:
+            self.load()
+
+    def load(self):
+        # Dictionaries are only loaded when first needed.
+        if self.loaded:
+            return
+        self.loaded = True
+        if not self.required and not self.exists(self.dpath, self.apath):
+            return
+        if self.native:
+            try:
+                self.words = affix.load(self.dpath, self.apath)
+            except affix.Unsupported:
+                self.hunspell = self.import_hunspell(self.required)
+            else:
+                self.word_count = len(self.words)
+                self.case_insensitive_count = wordlist.get_case_insensitive_combinations(self.words)[0]
+                return
+        if self.hunspell is not None:
+            self.hs = self.hunspell.HunSpell(self.dpath, self.apath)
+            with open(self.dpath, encoding=self.hs.get_dic_encoding()) as f:
                 self.word_count = int(f.readline().strip())
-        else:
-            self.hs = None
-            self.word_count = 0
+            self.case_insensitive_count = cache.load(
+                self.dpath, 'hunspell-case-insensitive', self.count_case_variations,
+            )
+
+    @staticmethod
+    def exists(dpath, apath):
+        return os.path.exists(dpath) and os.path.exists(apath)
+
+    def available(self):
+        return (self.native or self.hunspell is not None) and self.exists(self.dpath, self.apath)
+
+    @property
+    def scanner(self):
+        if not self.native:
+            return None
+        self.load()
+        if self.words is None:
+            return None
+        return self.unicode_scanner
+
+    @functools.cached_property
+    def unicode_scanner(self):
+        # Only built once words are loaded. Words are accepted in upper and title case, with non-ASCII letters too.
+        return wordlist.UnicodeScanner(self.words if hasattr(self.words, 'find') else automaton.Automaton(self.words))
+
+    @property
+    def max_length(self):
+        return None if self.words is None else wordlist.get_max_length(self.words)
 
     def import_hunspell(self, required=True):
         try:
@@ -107,7 +420,18 @@ class HunspellPattern(Pattern):
         else:
             return hunspell
 
+    def count_case_variations(self):
+        count = 0
+        with open(self.dpath, encoding=self.hs.get_dic_encoding()) as f:
+            for line in f:
+                word, _ = (line.strip() + '/').split('/', 1)
+                count += 2**len(word)
+        return count
+
     def matches(self, value):
+        self.load()
+        if self.words is not None:
+            return self.matches_words(value)
         if self.hs is None or len(value.bytes) <= 1 or is_binary(value.bytes):
             return False
         try:
@@ -115,26 +439,119 @@ class HunspellPattern(Pattern):
         except (UnicodeEncodeError, UnicodeDecodeError):
             return False
 
+    def matches_words(self, value):
+        # Same as hunspell, words are accepted in lower case, title case and upper case.
+        try:
+            v = value.bytes.decode('utf-8')
+        except UnicodeDecodeError:
+            return False
+        lower = v.lower()
+        if len(value.bytes) <= 1 or v not in (lower, lower[:1].upper() + lower[1:], v.upper()):
+            return False
+        return lower.encode('utf-8') in self.words
+
     def combinations(self, value):
         v = value.bytes.decode('utf-8')
+        if self.words is not None:
+            if v.islower():
+                return self.word_count
+            elif v == v[:1].upper() + v[1:].lower():
+                return self.word_count * 2
+            else:
+                return self.case_insensitive_count
         if v[0].isupper() and v[:1].islower():
             return self.word_count * 2
         elif not v.islower():
-            count = 0
-            with open(self.dpath, encoding=self.hs.get_dic_encoding()) as f:
-                for line in f:
-                    word, _ = (line.strip() + '/').split('/', 1)
-                    count += 2**len(word)
-            return count
+            return self.case_insensitive_count
         else:
             return self.word_count
 
+    def min_entropy(self, length):
+        self.load()
+        return math.log2(max(min(self.word_count, self.case_insensitive_count), 1))
+
+
+class BreachedCorpusPattern(Pattern):
+    """Passwords of a breached password corpus built by corpus.build(), looked up by SHA-1 of a value.
+
+    If ranked and the corpus has ranks, combinations are ranks of passwords by how often they were seen, otherwise the
+    number of passwords in the corpus.
+    """
+
+    def __init__(self, title, path, ranked=False):
+        super().__init__(title)
+        self.path = path
+        self.ranked = ranked
+        self.corpus = None
+        self.last = (None, None)
+
+    def available(self):
+        return os.path.exists(self.path)
+
+    def load(self):
+        if self.corpus is None:
+            self.corpus = corpus.load(self.path)
+
+    @functools.cached_property
+    def max_length(self):
+        # Length of the longest password is not known for corpora of hashes.
+        self.load()
+        return self.corpus.max_length or None
+
+    def lookup(self, value):
+        """Return (found, rank) of value, rank is None if corpus has no ranks."""
+        last = self.last
+        if last[0] is value:
+            return last[1]
+        self.load()
+        digest = hashlib.sha1(value.bytes).digest()
+        if self.corpus.ranked:
+            rank = self.corpus.rank(digest)
+            found = (rank is not None, rank)
+        else:
+            found = (digest in self.corpus, None)
+        self.last = (value, found)
+        return found
+
+    def matches(self, value):
+        return self.lookup(value)[0]
+
+    def combinations(self, value):
+        rank = self.lookup(value)[1]
+        return rank if self.ranked and rank is not None else len(self.corpus)
+
+    def min_entropy(self, length):
+        self.load()
+        return 0 if self.ranked and self.corpus.ranked else math.log2(max(len(self.corpus), 1))
+
 
 class SequencePatter(Pattern):
+    min_length = 2
 
     def __init__(self, title, sequence: bytes):
         super().__init__(title)
         self.sequence = sequence.encode() if isinstance(sequence, str) else sequence
+        self.max_length = len(self.sequence)
+        self.alphabet = set(self.sequence)
+
+    @property
+    def scanner(self):
+        return self
+
+    def find(self, text):
+        """Yield (i, j) positions of all fragments of text found in the sequence."""
+        sequence = self.sequence
+        for i in range(len(text) - 1):
+            end = i
+            start = sequence.find(text[i:i + 2])
+            while start != -1:
+                j = i + 2
+                while j < len(text) and start + j - i < len(sequence) and text[j] == sequence[start + j - i]:
+                    j += 1
+                end = max(end, j)
+                start = sequence.find(text[i:i + 2], start + 1)
+            for j in range(i + 2, end + 1):
+                yield i, j
 
     def matches(self, value):
         return len(value.bytes) > 1 and value.bytes in self.sequence
@@ -148,3 +565,79 @@ class SequencePatter(Pattern):
         #           yield seq[i:j+1]
         #
         return int(size * (size + 1) / 2)
+
+    def min_entropy(self, length):
+        # Values found at the start of the sequence have the fewest combinations.
+        return math.log2(max(length * (length + 1) // 2, 1))
+
+
+class KeyboardWalkPattern(Pattern):
+    """Walks over adjacent keys of a keyboard layout, like qwerty or 1qaz.
+
+    Walks are at least min_length characters long, walks of more bytes than the number of keys of the layout go over
+    some keys again, they are matched as several shorter walks.
+    """
+    min_length = 3
+
+    def __init__(self, title, layout='qwerty'):
+        super().__init__(title)
+        self.layout = keyboard.get_layout(layout)
+        self.max_length = self.layout.size
+        self.alphabet = self.layout.alphabet
+        # Walk of the last value, combinations() is called for the value just matched.
+        self.last = (None, None)
+        # Combinations of walks by (length, turns, shifted).
+        self.counts = {}
+
+    @property
+    def scanner(self):
+        return self
+
+    def find(self, text):
+        """Yield (i, j) positions of all walks in text, found in a single pass over text."""
+        for positions in self.layout.walks(text):
+            for a in range(len(positions) - self.min_length):
+                for b in range(a + self.min_length, len(positions)):
+                    if positions[b] - positions[a] > self.max_length:
+                        break
+                    yield positions[a], positions[b]
+
+    def get_walk(self, value):
+        last = self.last
+        if last[0] != value.bytes:
+            last = self.last = (value.bytes, self.layout.walk(value.bytes))
+        return last[1]
+
+    def matches(self, value):
+        if len(value.bytes) > self.max_length:
+            return False
+        walk = self.get_walk(value)
+        return walk is not None and walk[0] >= self.min_length
+
+    def combinations(self, value):
+        walk = self.get_walk(value)
+        if walk not in self.counts:
+            self.counts[walk] = self.count(*walk)
+        return self.counts[walk]
+
+    def count(self, length, turns, shifted):
+        # A walk starts at any of size keys and at each of its turns goes to any neighbour, out of degree on average.
+        # There are comb(i - 1, j - 1) ways to place j turns in a walk of i keys, so walks of 2 to length keys with up
+        # to turns turns number:
+        #
+        #   sum(comb(i - 1, j - 1) * size * degree**j for i in range(2, length + 1) for j in range(1, min(turns, i - 1) + 1))  # noqa
+        #
+        # Summing over i first gives the sum below.
+        size = self.layout.size
+        degree = fractions.Fraction(self.layout.moves, size)
+        count = size * sum((math.comb(length, j) - 1) * degree**j for j in range(1, turns + 1))
+        if shifted == length:
+            count *= 2
+        elif shifted:
+            count *= sum(math.comb(length, i) for i in range(1, min(shifted, length - shifted) + 1))
+        return math.ceil(count)
+
+    def min_entropy(self, length):
+        # The fewest combinations has a walk in a single direction without shift.
+        keys = max(self.min_length, -(-length // self.layout.max_char_length))
+        return math.log2(self.layout.moves * (keys - 1))
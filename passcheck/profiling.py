@@ -0,0 +1,115 @@
+import time
+
+
+class PatternStats(object):
+
+    counters = ('calls', 'hits', 'matches_time', 'combinations_time')
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self.calls = 0
+        self.hits = 0
+        self.matches_time = 0.0
+        self.combinations_time = 0.0
+
+    def as_dict(self):
+        return {
+            'pattern': str(self.pattern),
+            'calls': self.calls,
+            'hits': self.hits,
+            'matches_time': self.matches_time,
+            'combinations_time': self.combinations_time,
+        }
+
+
+class Stats(object):
+    """Time spent by PassCheck in each of its patterns and in each stage of checking passwords.
+
+    Byte class patterns are matched by PassCheck itself, without calling their matches(), so only time spent computing
+    their combinations is recorded.
+    """
+
+    counters = ('passwords', 'fragments', 'scan_time', 'scoring_time', 'segmentation_time')
+
+    def __init__(self, patterns):
+        self.patterns = [PatternStats(p) for p in patterns]
+        self.passwords = 0
+        self.fragments = 0
+        self.scan_time = 0.0
+        self.scoring_time = 0.0
+        self.segmentation_time = 0.0
+
+    def take(self):
+        """Return counters as plain numbers and reset them, so that stats of worker processes can be sent back and
+        added to stats of the parent process with add().
+        """
+        taken = []
+        for stats in [self] + self.patterns:
+            taken.append([getattr(stats, name) for name in stats.counters])
+            for name in stats.counters:
+                setattr(stats, name, type(getattr(stats, name))())
+        return taken
+
+    def add(self, taken):
+        for stats, values in zip([self] + self.patterns, taken):
+            for name, value in zip(stats.counters, values):
+                setattr(stats, name, getattr(stats, name) + value)
+
+    def as_dict(self):
+        return {
+            'passwords': self.passwords,
+            'fragments': self.fragments,
+            'scan_time': self.scan_time,
+            'scoring_time': self.scoring_time,
+            'segmentation_time': self.segmentation_time,
+            'patterns': [p.as_dict() for p in self.patterns],
+        }
+
+    def report(self):
+        """Yield lines of a human readable report."""
+        yield 'Passwords: %d, fragments: %d' % (self.passwords, self.fragments)
+        yield 'Scoring: %.06f seconds, of which scanning: %.06f seconds' % (self.scoring_time, self.scan_time)
+        yield 'Segmentation: %.06f seconds' % self.segmentation_time
+        yield '%10s %10s %12s %12s  %s' % ('calls', 'hits', 'matches ms', 'scoring ms', 'pattern')
+        for p in sorted(self.patterns, key=lambda p: -(p.matches_time + p.combinations_time)):
+            yield '%10d %10d %12.3f %12.3f  %s' % (
+                p.calls, p.hits, p.matches_time * 1e3, p.combinations_time * 1e3, p.pattern,
+            )
+
+
+class ProfiledPattern(object):
+    """Wraps a pattern, recording its calls to stats."""
+
+    def __init__(self, pattern, stats):
+        self.pattern = pattern
+        self.stats = stats
+
+    def __getattr__(self, name):
+        return getattr(self.pattern, name)
+
+    def __str__(self):
+        return str(self.pattern)
+
+    def matches(self, value):
+        start = time.perf_counter()
+        matches = self.pattern.matches(value)
+        self.stats.matches_time += time.perf_counter() - start
+        self.stats.calls += 1
+        self.stats.hits += bool(matches)
+        return matches
+
+    def entropy(self, value):
+        start = time.perf_counter()
+        entropy = self.pattern.entropy(value)
+        self.stats.combinations_time += time.perf_counter() - start
+        return entropy
+
+    def combinations(self, value):
+        start = time.perf_counter()
+        combinations = self.pattern.combinations(value)
+        self.stats.combinations_time += time.perf_counter() - start
+        return combinations
+
+
+def unwrap(pattern):
+    return pattern.pattern if isinstance(pattern, ProfiledPattern) else pattern
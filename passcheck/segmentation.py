@@ -0,0 +1,128 @@
+import heapq
+
+from array import array
+
+
+def cost(entropy):
+    """Cost of a single fragment of a composition.
+
+    Every fragment costs its entropy plus one bit, so that out of two compositions with the same entropy the one with
+    fewer fragments wins.
+    """
+    return entropy + 1
+
+
+def best(edges, n):
+    """Find the lowest cost path from 0 to n.
+
+    edges is a mapping of start position to a list of (end, entropy, result) tuples, as built by PassCheck.check.
+    Returns a tuple of results on the lowest cost path. Ties are broken in favour of the edge listed first.
+    """
+    inf = float('inf')
+    costs = [0] + [inf] * n
+    back = [None] * (n + 1)
+    for i in range(n):
+        if costs[i] == inf:
+            continue
+        for j, entropy, result in edges.get(i, ()):
+            c = costs[i] + cost(entropy)
+            if c < costs[j]:
+                costs[j] = c
+                back[j] = (i, result)
+
+    if n and back[n] is None:
+        raise ValueError("There is no path covering all %d bytes." % n)
+
+    return tuple(result for _, _, result in backtrack(back))
+
+
+def extend(costs, back, edges):
+    """Extend lowest cost paths by one position.
+
+    costs and back hold the lowest cost of a path to each position and (start, result) of the last edge on that path,
+    as built by best. edges is a list of (start, entropy, result) tuples of edges ending at the next position. Ties are
+    broken in favour of the edge listed first, so for the same edges the same path is found as by best.
+    """
+    found = None
+    for i, entropy, result in edges:
+        c = costs[i] + cost(entropy)
+        if found is None or c < found[0]:
+            found = (c, i, result)
+    costs.append(found[0])
+    back.append(found[1:])
+
+
+def backtrack(back):
+    """Return a list of (start, end, result) tuples on the path ending at the last position of back."""
+    path = []
+    j = len(back) - 1
+    while j > 0:
+        i, result = back[j]
+        path.append((i, j, result))
+        j = i
+    return path[::-1]
+
+
+def shortest(edges, n):
+    """Same as best, for edges given as an iterable of (start, end, entropy, item) tuples, ordered by start.
+
+    Only the lowest cost edge ending at each position is kept, so memory used does not depend on the number of edges.
+    Returns a list of (start, end, item) tuples on the lowest cost path.
+    """
+    costs = array('d', [0.0]) + array('d', [float('inf')]) * n
+    starts = array('l', [0]) * (n + 1)
+    items = [None] * (n + 1)
+    for i, j, entropy, item in edges:
+        c = costs[i] + cost(entropy)
+        if c < costs[j]:
+            costs[j] = c
+            starts[j] = i
+            items[j] = item
+
+    if n and items[n] is None:
+        raise ValueError("There is no path covering all %d bytes." % n)
+
+    path = []
+    j = n
+    while j > 0:
+        path.append((starts[j], j, items[j]))
+        j = starts[j]
+    return path[::-1]
+
+
+def k_best(edges, n, k):
+    """Return up to k lowest cost paths from 0 to n, as a list of (cost, path) tuples ordered by cost.
+
+    edges are the same as in shortest, but can be in any order, paths are lists of (start, end, item) tuples. The first
+    path is the same as the one found by shortest. Paths to each position are built lazily out of paths to earlier
+    positions, a heap holds the next best path through each edge ending at the position, until k paths are taken.
+    """
+    incoming = [[] for _ in range(n + 1)]
+    for i, j, entropy, item in edges:
+        incoming[j].append((i, cost(entropy), item))
+
+    # Up to k (cost, start, rank, edge) tuples for each position, each path extends path number rank to start by
+    # edge number edge of incoming.
+    paths = [[(0, None, None, None)]] + [[] for _ in range(n)]
+    for j in range(1, n + 1):
+        heap = [(paths[i][0][0] + c, i, 0, e) for e, (i, c, _) in enumerate(incoming[j]) if paths[i]]
+        heapq.heapify(heap)
+        while heap and len(paths[j]) < k:
+            total, i, rank, e = heapq.heappop(heap)
+            paths[j].append((total, i, rank, e))
+            if rank + 1 < len(paths[i]):
+                heapq.heappush(heap, (paths[i][rank + 1][0] + incoming[j][e][1], i, rank + 1, e))
+
+    if n and not paths[n]:
+        raise ValueError("There is no path covering all %d bytes." % n)
+
+    found = []
+    for total, i, rank, e in paths[n][:k]:
+        path = []
+        j = n
+        while j > 0:
+            path.append((i, j, incoming[j][e][2]))
+            j = i
+            _, i, rank, e = paths[j][rank]
+        found.append((total, path[::-1]))
+    return found
@@ -0,0 +1,94 @@
+"""Scoring daemon, keeping a loaded PassCheck in memory and answering requests over a Unix domain socket.
+
+Each request and response is a single line of JSON. Requests contain the password either as {"password": "text"} or
+hex encoded as {"hex": "..."}, responses are the same as records printed by passcheck -i, or {"error": "message"}.
+Requests longer than LIMIT bytes get an error and the connection is closed, passwords longer than MAX_LENGTH bytes get
+an error, so that a few long passwords can't keep all threads busy.
+"""
+
+import asyncio
+import binascii
+import json
+import socket
+
+from concurrent.futures import ThreadPoolExecutor
+
+from passcheck.formatting import format_record
+
+
+LIMIT = 2**20
+MAX_LENGTH = 4096
+
+
+def decode(request):
+    request = json.loads(request)
+    if 'hex' in request:
+        return binascii.unhexlify(request['hex'])
+    else:
+        return request['password'].encode()
+
+
+async def handle(reader, writer, passcheck, executor):
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            try:
+                line = await reader.readline()
+            except ValueError:
+                # The rest of the line is still to be read, the connection can't be used for other requests.
+                response = {'error': 'Invalid request: longer than %d bytes' % LIMIT}
+                writer.write(json.dumps(response, separators=(',', ':')).encode() + b'\n')
+                await writer.drain()
+                break
+            if not line:
+                break
+            try:
+                password = decode(line)
+            except (ValueError, KeyError, TypeError, AttributeError, binascii.Error) as e:
+                response = {'error': 'Invalid request: %s' % e}
+                password = None
+            if password is not None and len(password) > MAX_LENGTH:
+                response = {'error': 'Invalid request: password longer than %d bytes' % MAX_LENGTH}
+            elif password is not None:
+                # Passwords are checked in threads, so that a long password does not block other clients.
+                results = await loop.run_in_executor(executor, passcheck.check, password)
+                response = format_record(results)
+            writer.write(json.dumps(response, separators=(',', ':')).encode() + b'\n')
+            await writer.drain()
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+
+async def start(passcheck, path, executor):
+    return await asyncio.start_unix_server(
+        lambda reader, writer: handle(reader, writer, passcheck, executor),
+        path=path,
+        limit=LIMIT,
+    )
+
+
+def serve(passcheck, path, threads=4):
+    passcheck.load()
+
+    async def main():
+        with ThreadPoolExecutor(threads) as executor:
+            server = await start(passcheck, path, executor)
+            async with server:
+                await server.serve_forever()
+
+    asyncio.run(main())
+
+
+def request(path, password, timeout=None):
+    """Check password using a daemon listening on path, returns the response."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(path)
+        password = password.encode() if isinstance(password, str) else password
+        sock.sendall(json.dumps({'hex': binascii.hexlify(password).decode()}).encode() + b'\n')
+        with sock.makefile('rb') as f:
+            response = json.loads(f.readline())
+    if 'error' in response:
+        raise ValueError(response['error'])
+    return response
@@ -0,0 +1,97 @@
+"""Substitutions of letters of words, like p@ssw0rd for password.
+
+Substituted values are looked up in an index of words in a normal form, where each letter and each byte substituting it
+are replaced by the same byte, so that a value costs a single lookup however many substitutions it has. A byte can
+substitute more than one letter, all letters it can substitute share a normal form then, and words whose normal forms
+are the same are told apart by comparing them to the value.
+"""
+
+import hashlib
+import math
+
+
+# Bytes substituting letters, mapped to all letters they can substitute.
+SUBSTITUTIONS = {
+    '4': 'a',
+    '@': 'a',
+    '8': 'b',
+    '(': 'c',
+    '{': 'c',
+    '[': 'c',
+    '<': 'c',
+    '3': 'e',
+    '6': 'g',
+    '9': 'g',
+    '1': 'il',
+    '!': 'i',
+    '|': 'il',
+    '0': 'o',
+    '$': 's',
+    '5': 's',
+    '7': 'lt',
+    '+': 't',
+    '%': 'x',
+    '2': 'z',
+}
+
+
+class Substitutions(object):
+    """Substitutions compiled from a table mapping each substituting byte to letters it substitutes.
+
+    normal is a translation table to the normal form, choices maps each substituting byte to a set of letters.
+    """
+
+    def __init__(self, table=None):
+        table = SUBSTITUTIONS if table is None else table
+        self.choices = {}
+        for source, letters in table.items():
+            source = source.encode() if isinstance(source, str) else source
+            letters = letters.encode() if isinstance(letters, str) else letters
+            self.choices[source[0]] = set(letters)
+
+        # Letters substituted by the same byte share a normal form, the lowest of them.
+        classes = {}
+        for letters in self.choices.values():
+            group = set(letters).union(*(classes.get(letter, ()) for letter in letters))
+            for letter in group:
+                classes[letter] = group
+        normal = bytearray(range(256))
+        for letter, group in classes.items():
+            normal[letter] = min(group)
+        for source, letters in self.choices.items():
+            normal[source] = min(classes[min(letters)])
+        self.normal = bytes(normal)
+        self.sources = set(self.choices)
+        self.letters = set().union(*self.choices.values())
+        # Names cache files of indexes built with this table.
+        key = repr(sorted((s, sorted(c)) for s, c in self.choices.items()))
+        self.digest = hashlib.sha1(key.encode()).hexdigest()[:8]
+
+    def normalise(self, word):
+        return word.translate(self.normal)
+
+    def substituted(self, value, word):
+        """Return a list of (byte, letter) substitutions making word out of value, None if value is not a substituted
+        word.
+        """
+        found = []
+        for byte, letter in zip(value, word):
+            if byte != letter:
+                if letter not in self.choices.get(byte, ()):
+                    return None
+                found.append((byte, letter))
+        return found
+
+    def variations(self, value, found):
+        """Return the number of ways substitutions found can be made in a word, out of all of its letters they
+        substitute.
+
+        For each substituted letter, there are sum(comb(n, i) for i in range(1, min(s, u) + 1)) ways to substitute it,
+        where n is the number of times it is in word, of which s are substituted and u are not, and 2 ways if all are.
+        """
+        variations = 1
+        for byte, letter in set(found):
+            s = found.count((byte, letter))
+            u = value.count(letter)
+            variations *= max(sum(math.comb(s + u, i) for i in range(1, min(s, u) + 1)), 2)
+        return variations
@@ -1,3 +1,6 @@
+# Bytes that can appear in text, any other byte makes a value binary.
+TEXT_BYTES = frozenset({7, 8, 9, 10, 12, 13, 27} | set(range(0x20, 0x100)) - {0x7f})
+
+
 def is_binary(value):
-    textchars = bytearray({7, 8, 9, 10, 12, 13, 27} | set(range(0x20, 0x100)) - {0x7f})
-    return bool(value.translate(None, textchars))
+    return bool(value.translate(None, bytes(sorted(TEXT_BYTES))))
@@ -0,0 +1,94 @@
+"""Scoring of byte class patterns of a batch of passwords at once, with NumPy.
+
+Passwords are packed into a matrix of bytes, padded to the longest of them. For each start position, masks of byte
+classes common to all bytes of fragments starting there and lengths of runs of the same byte give the best byte class of
+every fragment in bulk, so that PassCheck only matches other patterns one fragment at a time. Without NumPy, PassCheck
+scores byte class patterns itself.
+"""
+
+import functools
+
+
+# Longer passwords are checked one at a time, a batch takes memory quadratic in length of its longest password.
+MAX_LENGTH = 256
+
+# Number of passwords scored by a single call of score_classes().
+BATCH_SIZE = 64
+
+# Classes are bits of 64 bit masks.
+MAX_CLASSES = 64
+
+# Number of fragments scored at once, passwords of similar length are scored together up to this many fragments.
+MAX_FRAGMENTS = 2**20
+
+
+@functools.lru_cache(maxsize=None)
+def get_numpy():
+    """Return numpy module, None if it is not installed.
+
+    NumPy takes longer to import than the rest of passcheck, so it is only imported once passwords are checked in
+    batches.
+    """
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def score_classes(passwords, count, masks, single, entropy):
+    """Return a list of (entropies, indexes) arrays of the best byte class of every fragment of each of passwords.
+
+    There are count classes, masks is a table of 256 masks with bit k set for bytes in class k, single is a mask of
+    classes only matching runs of the same byte and entropy(k, length) returns entropy of a fragment of given length
+    matched by class k, infinite if class k can't match it. entropies[i][length - 1] and indexes[i][length - 1] are
+    entropy and index of the best class of a fragment starting at i, index is -1 if no class matches it, values for
+    fragments past the end of a password are undefined. Ties are broken in favour of lower indexes.
+    """
+    scores = [None] * len(passwords)
+    batch = []
+    for k in sorted(range(len(passwords)), key=lambda k: len(passwords[k])):
+        if batch and (len(batch) + 1) * len(passwords[k])**2 > MAX_FRAGMENTS:
+            for b, score in zip(batch, _score_batch([passwords[b] for b in batch], count, masks, single, entropy)):
+                scores[b] = score
+            batch = []
+        batch.append(k)
+    for b, score in zip(batch, _score_batch([passwords[b] for b in batch], count, masks, single, entropy)):
+        scores[b] = score
+    return scores
+
+
+def _score_batch(passwords, count, masks, single, entropy):
+    numpy = get_numpy()
+    n = max(map(len, passwords), default=0)
+    batch = numpy.zeros((len(passwords), n), dtype=numpy.uint8)
+    for b, password in enumerate(passwords):
+        batch[b, :len(password)] = numpy.frombuffer(password, dtype=numpy.uint8)
+    members = numpy.array(masks, dtype=numpy.uint64)[batch]
+
+    # runs[:, i] is the number of bytes equal to the byte at i, starting at i.
+    runs = numpy.ones((len(passwords), n), dtype=numpy.int64)
+    equal = batch[:, 1:] == batch[:, :-1]
+    for i in range(n - 2, -1, -1):
+        runs[:, i] += numpy.where(equal[:, i], runs[:, i + 1], 0)
+
+    table = numpy.array([[entropy(k, length) for length in range(1, n + 1)] for k in range(count)]).reshape(count, n)
+    bits = [numpy.uint64(1 << k) for k in range(count)]
+    entropies = numpy.full((len(passwords), n, n), numpy.inf)
+    indexes = numpy.full((len(passwords), n, n), -1, dtype=numpy.int16)
+    lengths = numpy.arange(1, n + 1)
+    for i in range(n):
+        m = n - i
+        common = numpy.bitwise_and.accumulate(members[:, i:], axis=1)
+        runs_of_same = (lengths[:m] <= runs[:, i:i + 1]) & (lengths[:m] > 1)
+        best = entropies[:, i, :m]
+        index = indexes[:, i, :m]
+        for k in range(count):
+            matched = (common & bits[k]) != 0
+            if single >> k & 1:
+                matched &= runs_of_same
+            better = matched & (table[k, :m] < best)
+            best[better] = numpy.broadcast_to(table[k, :m], best.shape)[better]
+            index[better] = k
+
+    return [(entropies[b, :len(p), :len(p)], indexes[b, :len(p), :len(p)]) for b, p in enumerate(passwords)]
@@ -1,9 +1,518 @@
+import collections.abc
+import hashlib
+import marshal
+import mmap
+import os
 import os.path
+import struct
+import tempfile
 
+from array import array
 
-def load(path, required=False):
+from passcheck import automaton
+from passcheck import cache
+
+
+MAGIC = b'PCWL\x00\x00\x00\x01'
+HEADER = struct.Struct('=8sQQII')
+
+LEXICON_MAGIC = b'PCLX\x00\x00\x00\x01'
+LEXICON_HEADER = struct.Struct('=8sQQQQ')
+
+
+class Wordlist(dict):
+    """Lower cased words mapped to their rank, as loaded from path."""
+
+    def __init__(self, path, words=()):
+        super().__init__(words)
+        self.path = path
+
+
+def load(path, required=False, compiled=True):
+    """Load wordlist from a text file with one word per line.
+
+    If compiled, a wordlist compiled from path with compile() is used instead, if there is one. path can also point to
+    a compiled wordlist directly.
+    """
+    if compiled and os.path.exists(path):
+        words = load_compiled(path) or load_compiled(cache.get_path(path, 'wordlist'), path)
+        if words is not None:
+            return words
     if required or os.path.exists(path):
         with open(path) as f:
-            return {w.strip().lower().encode(): i for i, w in enumerate(f, 1)}
+            return Wordlist(path, ((w.strip().lower().encode(), i) for i, w in enumerate(f, 1)))
     else:
         return {}
+
+
+class LazyWordlist(collections.abc.Mapping):
+    """Wordlist loaded from path on first use."""
+
+    def __init__(self, path):
+        self.path = path
+        self.words = None
+        self.scanner = None
+
+    def load(self):
+        if self.words is None:
+            self.words = load(self.path, required=True)
+            self.scanner = self.words if hasattr(self.words, 'find') else automaton.Automaton(self.words)
+        return self.words
+
+    def __len__(self):
+        return len(self.load())
+
+    def __iter__(self):
+        return iter(self.load())
+
+    def __contains__(self, word):
+        return word in self.load()
+
+    def __getitem__(self, word):
+        return self.load()[word]
+
+    def find(self, text):
+        self.load()
+        return self.scanner.find(text)
+
+    @property
+    def max_length(self):
+        return get_max_length(self.load())
+
+
+class UnicodeScanner(object):
+    """Scanner finding words of a wordlist of lower case UTF-8 words in text lower cased as Unicode, not only as ASCII.
+
+    Other scanners only lower case ASCII letters, so that words with upper case letters like Ž would not be found.
+    """
+
+    def __init__(self, scanner):
+        self.scanner = scanner
+
+    def find(self, text):
+        if text.isascii():
+            return self.scanner.find(text)
+        return self.find_lowered(text)
+
+    def find_lowered(self, text):
+        lowered = bytearray()
+        # Offsets of characters in lowered text mapped to their offsets in text, lower case can be of another length.
+        offsets = {0: 0}
+        end = 0
+        for char in text.decode('utf-8', 'surrogateescape'):
+            end += len(char.encode('utf-8', 'surrogateescape'))
+            lowered += char.lower().encode('utf-8', 'surrogateescape')
+            offsets[len(lowered)] = end
+        for i, j in self.scanner.find(bytes(lowered)):
+            if i in offsets and j in offsets:
+                yield offsets[i], offsets[j]
+
+
+class Lexicon(collections.abc.Mapping):
+    """Union of wordlists loaded from paths on first use, mapping each word to its index.
+
+    A word is stored once, however many wordlists it is in, ranks[s][index] is rank of word in wordlist s, 0 if it is
+    not there. Patterns matching words of the same lexicon share a single lookup of each value. Words are kept in a
+    compiled lexicon, see load_lexicon(), only counts and totals of each wordlist are Python objects.
+    """
+
+    def __init__(self, paths):
+        self.paths = list(paths)
+        self.words = None
+        self.ranks = None
+        # Number of words and number of their case variations in each wordlist.
+        self.counts = None
+        self.totals = None
+        self.longest = None
+        self.scanner = None
+        self.tables = {}
+        self.last = (None, None)
+
+    def load(self):
+        if self.words is None:
+            words = load_lexicon(self.paths)
+            self.ranks = words.ranks
+            self.counts = words.counts
+            self.totals = words.totals
+            self.longest = words.max_length
+            self.scanner = words
+            self.words = words
+        return self.words
+
+    def __len__(self):
+        return len(self.load())
+
+    def __iter__(self):
+        return iter(self.load())
+
+    def __contains__(self, word):
+        return word in self.load()
+
+    def __getitem__(self, word):
+        return self.load()[word]
+
+    def find(self, text):
+        self.load()
+        return self.scanner.find(text)
+
+    @property
+    def max_length(self):
+        self.load()
+        return self.longest
+
+    def lookup(self, value):
+        """Return index of lower cased bytes of value, None if it is not a word.
+
+        The last lookup is remembered, so patterns checking the same value one after another only look it up once.
+        """
+        last = self.last
+        if last[0] is value:
+            return last[1]
+        index = self.load().index(value.bytes.lower())
+        self.last = (value, index)
+        return index
+
+    def get_rank(self, word):
+        """Return the lowest rank of word in any of the wordlists."""
+        index = self[word]
+        return min(ranks[index] for ranks in self.ranks if ranks[index])
+
+    def get_case_insensitive_table(self, s):
+        """Return a table of words of wordlist s, by index, to the number of case variations of all words up to and
+        including that word, in order of their rank.
+        """
+        if s not in self.tables:
+            words = self.load()
+            ranks = self.ranks[s]
+            table = {}
+            total = 0
+            for k in sorted((k for k in range(len(words)) if ranks[k]), key=ranks.__getitem__):
+                total += 2**words.length(k)
+                table[k] = total
+            self.tables[s] = table
+        return self.tables[s]
+
+
+def get_max_length(words):
+    """Return length of the longest word."""
+    max_length = getattr(words, 'max_length', None)
+    return max(map(len, words), default=0) if max_length is None else max_length
+
+
+def get_case_insensitive_combinations(words, ranked=False):
+    """Return total number of case variations of all words and, if ranked, a table of running totals.
+
+    The table maps each word to the number of case variations of all words up to and including that word, in words
+    order. If words were loaded from a file, results are cached on disk.
+    """
+
+    def build():
+        total = 0
+        table = {}
+        for w in words:
+            total += 2**len(w)
+            if ranked:
+                table.setdefault(w, total)
+        return total, table
+
+    path = getattr(words, 'path', None)
+    if path:
+        return cache.load(path, 'ranked-case-insensitive' if ranked else 'case-insensitive', build)
+    else:
+        return build()
+
+
+def get_normalised_index(words, substitutions, ambiguity=8):
+    """Return a dict of normal forms of words, with letters substituted by substitutions, to a tuple of up to ambiguity
+    words with that normal form, in words order.
+
+    Only words with letters that can be substituted are in the index. If words were loaded from a file, the index is
+    cached on disk.
+    """
+
+    def build():
+        letters = bytes(sorted(substitutions.letters))
+        index = {}
+        for word in words:
+            if len(word.translate(None, letters)) == len(word):
+                continue
+            key = substitutions.normalise(word)
+            found = index.get(key, ())
+            if len(found) < ambiguity:
+                index[key] = found + (word,)
+        return index
+
+    path = getattr(words, 'path', None)
+    if path:
+        return cache.load(path, 'substitutions-%s-%d' % (substitutions.digest, ambiguity), build)
+    else:
+        return build()
+
+
+class CompiledWordlist(collections.abc.Mapping):
+    """Read only mapping of words to their rank, backed by a memory mapped file written by compile().
+
+    File starts with a header (magic, source mtime and size, number of words and length of the longest word), followed
+    by four arrays of native unsigned 32 bit integers: ranks and data offsets of words in sorted order, sorted index of
+    words in their original order, and finally all sorted words concatenated. Words are looked up with binary search,
+    without loading them into Python objects.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError("%s is not a compiled wordlist." % path)
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.mtime, self.size, self.count, self.max_length = HEADER.unpack_from(self.mm)
+        n = self.count
+        view = memoryview(self.mm)
+        start = HEADER.size
+        self.ranks = view[start:start + 4 * n].cast('I')
+        start += 4 * n
+        self.order = view[start:start + 4 * n].cast('I')
+        start += 4 * n
+        self.offsets = view[start:start + 4 * (n + 1)].cast('I')
+        start += 4 * (n + 1)
+        self.data = start
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        for k in self.order:
+            yield self.word(k)
+
+    def __contains__(self, word):
+        return self.index(word) is not None
+
+    def __getitem__(self, word):
+        k = self.index(word)
+        if k is None:
+            raise KeyError(word)
+        return self.ranks[k]
+
+    def items(self):
+        # Faster than looking up each word, yields words in sorted order.
+        for k in range(self.count):
+            yield self.word(k), self.ranks[k]
+
+    def word(self, k):
+        return self.mm[self.data + self.offsets[k]:self.data + self.offsets[k + 1]]
+
+    def length(self, k):
+        return self.offsets[k + 1] - self.offsets[k]
+
+    def bisect(self, prefix, lo=0, hi=None):
+        """Return range of indexes of words starting with prefix, within lo and hi."""
+        hi = self.count if hi is None else hi
+        a, b = lo, hi
+        while a < b:
+            k = (a + b) // 2
+            if self.word(k) < prefix:
+                a = k + 1
+            else:
+                b = k
+        lo = a
+        b = hi
+        n = len(prefix)
+        while a < b:
+            k = (a + b) // 2
+            if self.word(k)[:n] <= prefix:
+                a = k + 1
+            else:
+                b = k
+        return lo, a
+
+    def index(self, word):
+        if not isinstance(word, bytes):
+            return None
+        lo, hi = self.bisect(word)
+        if lo < hi and self.word(lo) == word:
+            return lo
+        return None
+
+    def find(self, text):
+        """Yield (i, j) positions of all words found in text, so that text[i:j].lower() is a word.
+
+        Same as automaton.Automaton.find, but searches words for each start position, narrowing the range of words
+        while they share a common prefix with the text.
+        """
+        text = text.lower()
+        for i in range(len(text)):
+            lo, hi = 0, self.count
+            for j in range(i + 1, min(len(text), i + self.max_length) + 1):
+                prefix = text[i:j]
+                lo, hi = self.bisect(prefix, lo, hi)
+                if lo == hi:
+                    break
+                if self.word(lo) == prefix:
+                    yield i, j
+
+
+def compile(source, target=None):
+    """Compile wordlist from source text file to target, by default to the file used by load(source)."""
+    words = load(source, required=True, compiled=False)
+    target = target or cache.get_path(source, 'wordlist')
+    return write(words, target, cache.get_stamp(source))
+
+
+def write(words, target, stamp):
+    """Write a compiled wordlist of words, a mapping of words to their rank, stamped with (mtime, size) of its source.
+    """
+    original = list(words)
+    order = sorted(range(len(original)), key=original.__getitem__)
+    ranks = array('I', (words[original[k]] for k in order))
+    index = array('I', [0]) * len(order)
+    for i, k in enumerate(order):
+        index[k] = i
+    offsets = array('I', [0])
+    for k in order:
+        offsets.append(offsets[-1] + len(original[k]))
+    max_length = max(map(len, original), default=0)
+
+    os.makedirs(os.path.dirname(os.path.abspath(target)), exist_ok=True)
+    tmp = '%s.%d.tmp' % (target, os.getpid())
+    with open(tmp, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, stamp[0], stamp[1], len(order), max_length))
+        ranks.tofile(f)
+        index.tofile(f)
+        offsets.tofile(f)
+        for k in order:
+            f.write(original[k])
+    os.replace(tmp, target)
+    return target
+
+
+def load_compiled(path, source=None, stamp=None):
+    """Open compiled wordlist, returns None if it does not exist or source was changed after compilation.
+
+    Instead of source, its (mtime, size) stamp can be given.
+    """
+    try:
+        words = CompiledWordlist(path)
+    except (OSError, ValueError):
+        return None
+    if source is not None:
+        stamp = cache.get_stamp(source)
+    if stamp is not None and (words.mtime, words.size) != tuple(stamp):
+        return None
+    return words
+
+
+class CompiledLexicon(CompiledWordlist):
+    """Read only mapping of words of several wordlists to their index, backed by a memory mapped file written by
+    write_lexicon().
+
+    File starts with a header (magic, number of wordlists, number of words, length of the longest word and offset of
+    info), followed by arrays of native unsigned 32 bit integers: ranks of words in sorted order in each wordlist, 0 if
+    a word is not in it, sorted index of words in the order they were first seen and data offsets of words, then all
+    sorted words concatenated. Info is marshalled (stamps, counts, totals) of wordlists, None stamps are of missing
+    wordlists.
+    """
+
+    def __init__(self, path, f=None):
+        self.path = path
+        # f is an open temporary file, when there is no path.
+        with open(path if f is None else f.fileno(), 'rb', closefd=f is None) as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.mm[:len(LEXICON_MAGIC)] != LEXICON_MAGIC:
+            raise ValueError("%s is not a compiled lexicon." % path)
+        magic, sources, self.count, self.max_length, info = LEXICON_HEADER.unpack_from(self.mm)
+        n = self.count
+        view = memoryview(self.mm)
+        start = LEXICON_HEADER.size
+        self.ranks = []
+        for _ in range(sources):
+            self.ranks.append(view[start:start + 4 * n].cast('I'))
+            start += 4 * n
+        self.order = view[start:start + 4 * n].cast('I')
+        start += 4 * n
+        self.offsets = view[start:start + 4 * (n + 1)].cast('I')
+        start += 4 * (n + 1)
+        self.data = start
+        stamps, self.counts, self.totals = marshal.loads(self.mm[info:])
+        self.stamps = [None if stamp is None else tuple(stamp) for stamp in stamps]
+
+    def __getitem__(self, word):
+        k = self.index(word)
+        if k is None:
+            raise KeyError(word)
+        return k
+
+    def items(self):
+        for k in range(self.count):
+            yield self.word(k), k
+
+
+def get_stamps(paths):
+    return [cache.get_stamp(path) if os.path.exists(path) else None for path in paths]
+
+
+def write_lexicon(paths, f):
+    """Write a compiled lexicon of wordlists at paths to binary file f, missing wordlists are empty."""
+    stamps = get_stamps(paths)
+    words = {}
+    counts = []
+    totals = []
+    for s, path in enumerate(paths):
+        source = load(path)
+        total = 0
+        for word in source:
+            words.setdefault(word, [0] * len(paths))[s] = source[word]
+            total += 2**len(word)
+        counts.append(len(source))
+        totals.append(total)
+
+    original = list(words)
+    order = sorted(range(len(original)), key=original.__getitem__)
+    index = array('I', [0]) * len(order)
+    for i, k in enumerate(order):
+        index[k] = i
+    offsets = array('I', [0])
+    for k in order:
+        offsets.append(offsets[-1] + len(original[k]))
+    max_length = max(map(len, original), default=0)
+
+    f.write(LEXICON_HEADER.pack(LEXICON_MAGIC, 0, 0, 0, 0))
+    for s in range(len(paths)):
+        array('I', (words[original[k]][s] for k in order)).tofile(f)
+    index.tofile(f)
+    offsets.tofile(f)
+    for k in order:
+        f.write(original[k])
+    info = f.tell()
+    marshal.dump((stamps, counts, totals), f)
+    f.seek(0)
+    f.write(LEXICON_HEADER.pack(LEXICON_MAGIC, len(paths), len(order), max_length, info))
+    f.flush()
+
+
+def load_lexicon(paths):
+    """Return a compiled lexicon of wordlists at paths, compiled into the cache directory on first use and again when
+    any of them changes.
+    """
+    digest = hashlib.sha1('\0'.join(map(os.path.abspath, paths)).encode()).hexdigest()[:12]
+    path = cache.get_path(paths[0], 'lexicon-%s' % digest)
+    try:
+        words = CompiledLexicon(path)
+    except (OSError, ValueError):
+        pass
+    else:
+        if words.stamps == get_stamps(paths):
+            return words
+
+    tmp = '%s.%d.tmp' % (path, os.getpid())
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp, 'wb') as f:
+            write_lexicon(paths, f)
+        os.replace(tmp, path)
+    except OSError:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        # Cache directory is not writable, the lexicon is mapped from a temporary file, deleted once it is closed.
+        with tempfile.TemporaryFile() as f:
+            write_lexicon(paths, f)
+            return CompiledLexicon(None, f)
+    return CompiledLexicon(path)
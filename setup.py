@@ -8,6 +8,7 @@ setup(
     extras_require={
         'full': [
             'hunspell',
+            'numpy',
         ],
     },
     entry_points={
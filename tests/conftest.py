@@ -0,0 +1,7 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(monkeypatch, tmp_path):
+    monkeypatch.setenv('PASSCHECK_CACHE_DIR', str(tmp_path / 'cache'))
+    return tmp_path / 'cache'
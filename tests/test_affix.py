@@ -0,0 +1,135 @@
+from unittest.mock import patch
+
+import pytest
+
+from passcheck import affix
+from passcheck import patterns as pt
+from passcheck.passcheck import PassCheck, Value
+
+
+AFF = '''\
+SET UTF-8
+NEEDAFFIX X
+FORBIDDENWORD !
+
+PFX A Y 1
+PFX A   0     re         .
+
+SFX D Y 4
+SFX D   0     d          e
+SFX D   y     ied        [^aeiou]y
+SFX D   0     ed         [^ey]
+SFX D   0     ed         [aeiou]y
+
+SFX S Y 1
+SFX S   0     s/Z        .
+
+SFX Z Y 1
+SFX Z   0     'es        .
+
+SFX N N 1
+SFX N   o     ų          o
+'''
+
+DIC = '''\
+6
+create/AD
+try/D
+bake/S
+foo/!
+stem/XD
+žodžio/N
+'''
+
+
+@pytest.fixture
+def dictionary(tmp_path):
+    dpath = tmp_path / 'test.dic'
+    apath = tmp_path / 'test.aff'
+    dpath.write_text(DIC)
+    apath.write_text(AFF)
+    return str(dpath), str(apath)
+
+
+def test_expand(dictionary):
+    assert affix.expand(*dictionary) == {
+        b'create': 1, b'created': 1, b'recreate': 1, b'recreated': 1,
+        b'try': 2, b'tried': 2,
+        b'bake': 3, b'bakes': 3, b"bakes'es": 3,
+        b'stemed': 5,
+        'žodžio'.encode(): 6, 'žodžių'.encode(): 6,
+    }
+
+
+def test_condition():
+    assert affix.get_condition('[^aeiou]y') == '[^aeiou]y'
+    assert affix.get_condition('[a-z].') == '[a\\-z].'
+
+
+def test_load_cached(dictionary):
+    words = affix.load(*dictionary)
+    assert words[b'recreated'] == 1
+    with patch.object(affix, 'expand', side_effect=AssertionError):
+        assert dict(affix.load(*dictionary)) == dict(words)
+
+
+def test_unsupported(dictionary):
+    with open(dictionary[1], 'a') as f:
+        f.write('IGNORE x\n')
+    with pytest.raises(affix.Unsupported):
+        affix.expand(*dictionary)
+
+
+def test_native_pattern(dictionary):
+    pattern = pt.HunspellPattern('words', *dictionary, native=True)
+    assert pattern.hunspell is None
+    for word in [b'recreated', b'Recreated', b'RECREATED', 'Žodžių'.encode()]:
+        assert pattern.matches(Value(word))
+    for word in [b'reCreated', b'foo', b'stem', b'recreatedx']:
+        assert not pattern.matches(Value(word))
+    assert pattern.word_count == 12
+    assert pattern.combinations(Value(b'tried')) == 12
+    assert pattern.combinations(Value(b'Tried')) == 24
+    results = PassCheck([pattern]).check(b'xxTRIEDbakes')
+    assert [(r.value.bytes, str(r.pattern)) for r in results][-2:] == [(b'TRIED', 'words'), (b'bakes', 'words')]
+
+
+def test_native_pattern_unicode_case(dictionary):
+    pattern = pt.HunspellPattern('words', *dictionary, native=True)
+    for word in ['Žodžio', 'ŽODŽIŲ']:
+        results = PassCheck([pattern]).check(('x' + word + '1').encode())
+        assert [(r.value.bytes.decode(), str(r.pattern)) for r in results] == [
+            ('x', 'default'), (word, 'words'), ('1', 'default'),
+        ]
+    assert sorted(pattern.scanner.find('ŽodžioŽODŽIŲ'.encode())) == [(0, 8), (8, 17)]
+
+
+def test_native_pattern_unsupported(dictionary):
+    with open(dictionary[1], 'a') as f:
+        f.write('IGNORE x\n')
+    with patch.object(pt.HunspellPattern, 'import_hunspell') as import_hunspell:
+        import_hunspell.return_value.HunSpell.return_value.get_dic_encoding.return_value = 'utf-8'
+        import_hunspell.return_value.HunSpell.return_value.spell.return_value = True
+        pattern = pt.HunspellPattern('words', *dictionary, native=True)
+    assert pattern.words is None
+    assert pattern.scanner is None
+    assert pattern.matches(Value(b'anything'))
+
+
+def test_substitution_pattern(dictionary):
+    words = affix.LazyDictionary(*dictionary)
+    pattern = pt.SubstitutionDictPattern('substitutions', words)
+    assert pattern.available()
+    assert words.words is None
+    for word in ['ž0džio', 'žodž1o', 'r3cr3ated', 'b4kes']:
+        assert pattern.matches(Value(word.encode()))
+    assert not pattern.matches(Value(b'f00'))
+    assert pattern.max_length == len(b'recreated')
+    assert not pt.SubstitutionDictPattern('', affix.LazyDictionary(dictionary[0], 'missing.aff')).available()
+
+
+def test_substitution_pattern_unsupported(dictionary):
+    with open(dictionary[1], 'a') as f:
+        f.write('IGNORE x\n')
+    pattern = pt.SubstitutionDictPattern('substitutions', affix.LazyDictionary(*dictionary))
+    assert not pattern.matches(Value(b'r3created'))
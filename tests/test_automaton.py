@@ -0,0 +1,22 @@
+from passcheck.automaton import Automaton
+
+
+def find(words, text):
+    return sorted(Automaton(words).find(text))
+
+
+def test_find():
+    assert find([b'he', b'she', b'his', b'hers'], b'ushers') == [(1, 4), (2, 4), (2, 6)]
+
+
+def test_find_overlapping():
+    assert find([b'a', b'ab', b'bab'], b'abab') == [(0, 1), (0, 2), (1, 4), (2, 3), (2, 4)]
+
+
+def test_find_case_insensitive():
+    assert find([b'Pass', b'word'], b'PASSWord') == [(0, 4), (4, 8)]
+
+
+def test_find_nothing():
+    assert find([], b'abc') == []
+    assert find([b'abc'], b'') == []
@@ -0,0 +1,51 @@
+import io
+import json
+
+import pytest
+
+from passcheck import bench
+from passcheck.commandline import main
+
+
+def test_generate():
+    passwords = bench.generate(20, seed=1)
+    assert passwords == bench.generate(20, seed=1)
+    assert passwords != bench.generate(20, seed=2)
+    assert all(8 <= len(p) <= 16 for p in passwords)
+
+
+@pytest.mark.parametrize('corpus', sorted(bench.CORPORA))
+def test_generate_corpus(corpus):
+    passwords = bench.generate(20, **bench.CORPORA[corpus])
+    assert len(passwords) == 20
+    assert all(bench.CORPORA[corpus]['min_length'] <= len(p) <= bench.CORPORA[corpus]['max_length'] for p in passwords)
+
+
+def test_generate_digits():
+    assert all(p.isdigit() for p in bench.generate(20, alphabet='digits', density=0))
+
+
+def test_percentile():
+    assert bench.percentile(list(range(100)), 50) == 50
+    assert bench.percentile(list(range(100)), 99) == 99
+    assert bench.percentile([1], 90) == 1
+
+
+def test_compare():
+    base = {'cold_start': 0.2, 'corpora': {'short': {'throughput': 100, 'p50': 1, 'p90': 2, 'p99': 3}}}
+    results = {'cold_start': 0.1, 'corpora': {'short': {'throughput': 200, 'p50': 1, 'p90': 2, 'p99': 3}}}
+    assert list(bench.compare(base, results))[:2] == [('cold_start', 0.2, 0.1), ('short throughput', 100, 200)]
+
+
+def test_main(tmp_path):
+    output = io.StringIO()
+    path = str(tmp_path / 'results.json')
+    main(['bench', '-n', '5', '-j', '1,2', '--corpus', 'short', '--cold-start-runs', '0', '-o', path], output)
+    results = json.loads(open(path).read())
+    assert list(results['corpora']) == ['short']
+    assert [r['workers'] for r in results['scaling']] == [1, 2]
+    assert results['peak_rss'] > 0
+
+    output = io.StringIO()
+    main(['bench', '-n', '5', '--corpus', 'short', '--cold-start-runs', '0', '--compare', path], output)
+    assert 'short throughput' in output.getvalue()
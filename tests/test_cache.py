@@ -0,0 +1,71 @@
+import os
+
+import pytest
+
+from unittest.mock import Mock
+
+from passcheck import cache
+
+
+def test_load(tmp_path):
+    source = tmp_path / 'words'
+    source.write_text('one\n')
+    build = Mock(return_value={b'one': 1})
+    assert cache.load(str(source), 'test', build) == {b'one': 1}
+    assert cache.load(str(source), 'test', build) == {b'one': 1}
+    assert build.call_count == 1
+
+
+def test_load_changed(tmp_path):
+    source = tmp_path / 'words'
+    source.write_text('one\n')
+    assert cache.load(str(source), 'test', lambda: 1) == 1
+    source.write_text('one\ntwo\n')
+    assert cache.load(str(source), 'test', lambda: 2) == 2
+
+
+def test_load_not_writable(tmp_path, monkeypatch):
+    source = tmp_path / 'words'
+    source.write_text('one\n')
+    (tmp_path / 'file').write_text('')
+    monkeypatch.setenv('PASSCHECK_CACHE_DIR', str(tmp_path / 'file' / 'cache'))
+    assert cache.load(str(source), 'test', lambda: 1) == 1
+    assert not os.path.exists(cache.get_path(str(source), 'test'))
+
+
+def test_lru():
+    lru = cache.LRUCache(2)
+    lru.put(b'a', 1)
+    lru.put(b'b', 2)
+    assert lru.get(b'a') == 1
+    lru.put(b'c', 3)
+    assert lru.get(b'b') is None
+    assert lru.get(b'a') == 1
+    assert lru.get(b'c') == 3
+    assert (lru.hits, lru.misses) == (3, 1)
+
+
+def test_fifo():
+    lru = cache.LRUCache(2, 'fifo')
+    lru.put(b'a', 1)
+    lru.put(b'b', 2)
+    assert lru.get(b'a') == 1
+    lru.put(b'c', 3)
+    assert lru.get(b'a') is None
+    assert len(lru) == 2
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        cache.LRUCache(2, 'random')
+
+
+def test_lru_fork():
+    lru = cache.LRUCache(2)
+    lru.put(b'a', 1)
+    with lru.lock:
+        pid = os.fork()
+        if pid == 0:
+            os._exit(0 if lru.get(b'a') == 1 else 1)
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
@@ -1,7 +1,12 @@
 import io
+import json
 import re
 
-from passcheck.commandline import main
+import pytest
+
+from passcheck import corpus
+from passcheck import wordlist
+from passcheck.commandline import main, read_passwords
 
 
 def test_main():
@@ -18,3 +23,145 @@ def test_main():
         'Brute force (1e12 guesses/second): 7 years\n'
         'Time to process: [0-9.]+ seconds\n'
     ), output.getvalue())
+
+
+def test_compile_wordlist(tmp_path):
+    source = tmp_path / 'words'
+    source.write_text('one\ntwo\n')
+    output = io.StringIO()
+    main(['compile-wordlist', str(source), '-o', str(tmp_path / 'words.pcwl')], output)
+    assert output.getvalue() == '%s -> %s\n' % (source, tmp_path / 'words.pcwl')
+    assert dict(wordlist.load(str(tmp_path / 'words.pcwl'))) == {b'one': 1, b'two': 2}
+
+
+def test_check_many(tmp_path):
+    path = tmp_path / 'passwords'
+    path.write_bytes(b'123aaa\n\nabc\n')
+    output = io.StringIO()
+    main(['-i', str(path)], output)
+    assert output.getvalue() == (
+        '{"n":1,"entropy":9.6073,"bytes":6,"patterns":["123... sequence","single lower case letter repeated"]}\n'
+        '{"n":2,"entropy":0,"bytes":0,"patterns":[]}\n'
+        '{"n":3,"entropy":2.585,"bytes":3,"patterns":["abc... sequence"]}\n'
+    )
+
+
+def test_check_many_null_hex(tmp_path):
+    path = tmp_path / 'passwords'
+    path.write_bytes(b'313233\x00616263')
+    output = io.StringIO()
+    main(['-i', str(path), '-0', '-x'], output)
+    assert [json.loads(line)['patterns'] for line in output.getvalue().splitlines()] == [
+        ['123... sequence'],
+        ['abc... sequence'],
+    ]
+
+
+def test_read_passwords():
+    f = io.BytesIO(b'one\ntwo\nthree')
+    assert list(read_passwords(f, b'\n', size=2)) == [b'one', b'two', b'three']
+
+
+def test_read_passwords_invalid_hex():
+    f = io.BytesIO(b'6f6e65\nxyz\n74776f\n7')
+    errors = []
+    assert list(read_passwords(f, b'\n', unhexlify=True, errors=errors)) == [b'one', b'two']
+    assert [n for n, _ in errors] == [2, 4]
+
+
+def test_check_many_invalid_hex(tmp_path):
+    path = tmp_path / 'passwords'
+    path.write_bytes(b'xyz\n313233616161\nzz\n\n616263\n')
+    output = io.StringIO()
+    main(['-i', str(path), '-x'], output)
+    records = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert [record['n'] for record in records] == [1, 2, 3, 4, 5]
+    assert ['error' in record for record in records] == [True, False, True, False, False]
+    output = io.StringIO()
+    assert main(['-i', str(path), '-x', '--min-bits', '0'], output) == 1
+    records = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert [record.get('meets') for record in records] == [None, True, None, True, True]
+
+
+def test_check_many_jobs(tmp_path):
+    path = tmp_path / 'passwords'
+    path.write_bytes(b'123aaa\nabc\n' * 10)
+    expected = io.StringIO()
+    main(['-i', str(path)], expected)
+    output = io.StringIO()
+    main(['-i', str(path), '-j', '2'], output)
+    assert output.getvalue() == expected.getvalue()
+
+
+def test_check_many_debug(tmp_path, capsys):
+    path = tmp_path / 'passwords'
+    path.write_bytes(b'123aaa\nabc\n')
+    output = io.StringIO()
+    main(['-i', str(path), '--debug'], output)
+    assert [json.loads(line)['n'] for line in output.getvalue().splitlines()] == [1, 2]
+    assert '-----' in capsys.readouterr().err
+
+
+def test_profile():
+    output = io.StringIO()
+    main(['--profile', '--debug', '-q', '123'], output)
+    profile = json.loads(output.getvalue().split('\n', 3)[3])
+    assert profile['passwords'] >= 1
+    assert '123... sequence' in [p['pattern'] for p in profile['patterns']]
+
+
+def test_min_bits():
+    output = io.StringIO()
+    assert main(['abc', '--min-bits', '10'], output) == 1
+    assert main(['abc', '--min-bits', '2'], output) == 0
+    assert main(['abc', '--min-bits', '2', '-q'], output) == 0
+    assert output.getvalue() == 'Fail: entropy is less than 10 bits\nPass: entropy is at least 2 bits\n'
+
+
+def test_check_many_min_bits(tmp_path):
+    path = tmp_path / 'passwords'
+    path.write_bytes(b'abc\n\x19\xa8\x1d\xc4\xa3\n')
+    output = io.StringIO()
+    assert main(['-i', str(path), '--min-bits', '30'], output) == 1
+    assert output.getvalue() == '{"n":1,"meets":false}\n{"n":2,"meets":true}\n'
+
+
+def test_max_span():
+    output = io.StringIO()
+    main(['-q', '--max-span', '4', 'a' * 1000], output)
+    main(['-q', '--max-span', 'auto', 'abc'], output)
+    assert output.getvalue() == '\nEntropy: 15 bits\n\nEntropy: 3 bits\n'
+
+
+@pytest.mark.parametrize('value', ['0', '-1', 'x'])
+def test_max_span_invalid(value, capsys):
+    with pytest.raises(SystemExit):
+        main(['-q', '--max-span', value, 'abc'], io.StringIO())
+    assert '--max-span' in capsys.readouterr().err
+
+
+def test_top():
+    output = io.StringIO()
+    main(['-q', '--top', '3', 'abc'], output)
+    assert output.getvalue() == (
+        '\nEntropy: 3 bits\n'
+        '\nTop 3 compositions:\n'
+        "1. 3 bits: 'abc' abc... sequence\n"
+        "2. 6 bits: 'ab' abc... sequence | 'c' hex digits (lower case)\n"
+        "3. 7 bits: 'a' hex digits (lower case) | 'bc' abc... sequence\n"
+    )
+
+
+def test_top_invalid(capsys):
+    with pytest.raises(SystemExit):
+        main(['-q', '--top', '0', 'abc'], io.StringIO())
+    assert '--top' in capsys.readouterr().err
+
+
+def test_build_corpus(tmp_path):
+    source = tmp_path / 'passwords'
+    source.write_text('123456:5\npassword:7\n')
+    output = io.StringIO()
+    main(['build-corpus', str(source), '-o', str(tmp_path / 'corpus'), '--counts', '--ranked'], output)
+    assert output.getvalue() == '%s -> %s\n' % (source, tmp_path / 'corpus')
+    assert len(corpus.load(str(tmp_path / 'corpus'))) == 2
@@ -0,0 +1,74 @@
+import hashlib
+
+import pytest
+
+from passcheck import corpus
+
+
+def sha1(password):
+    return hashlib.sha1(password).digest()
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / 'passwords'
+    path.write_bytes(b'123456:50\npassword:70\nqwerty:10\nletmein:10\n123456:30\n')
+    return str(path)
+
+
+def test_read(source):
+    assert list(corpus.read(source, counts=True))[:2] == [(sha1(b'123456'), 50, 6), (sha1(b'password'), 70, 8)]
+    assert list(corpus.read(source))[0] == (sha1(b'123456:50'), 1, 9)
+
+
+@pytest.mark.parametrize('run_size', [2, 2**22])
+def test_table(source, tmp_path, run_size):
+    target = corpus.build_table(source, str(tmp_path / 'corpus'), counts=True, run_size=run_size)
+    table = corpus.load(target)
+    assert isinstance(table, corpus.Table)
+    assert len(table) == 4
+    assert table.max_length == 8
+    # Counts of the same password are added up, passwords seen the same number of times share a rank.
+    assert [table.rank(sha1(p)) for p in [b'123456', b'password', b'qwerty', b'letmein', b'dragon']] == [
+        1, 2, 3, 3, None,
+    ]
+    assert sha1(b'qwerty') in table
+    assert sha1(b'dragon') not in table
+
+
+def test_table_lines(tmp_path):
+    source = tmp_path / 'passwords'
+    source.write_bytes(b'123456\npassword\n123456\nqwerty\n')
+    table = corpus.load(corpus.build(str(source), str(tmp_path / 'corpus'), ranked=True))
+    assert [table.rank(sha1(p)) for p in [b'123456', b'password', b'qwerty']] == [1, 2, 4]
+
+
+def test_table_hashed(tmp_path):
+    source = tmp_path / 'hashes'
+    source.write_text('%s:3\n%s:5\n' % (sha1(b'password').hex().upper(), sha1(b'123456').hex().upper()))
+    table = corpus.load(corpus.build(str(source), str(tmp_path / 'corpus'), ranked=True, hashed=True, counts=True))
+    assert table.max_length == 0
+    assert [table.rank(sha1(p)) for p in [b'123456', b'password']] == [1, 2]
+
+
+def test_bloom(tmp_path):
+    source = tmp_path / 'passwords'
+    source.write_bytes(b''.join(b'password%d\n' % i for i in range(1000)))
+    bloom = corpus.load(corpus.build(str(source), str(tmp_path / 'corpus'), false_positive_rate=0.01))
+    assert isinstance(bloom, corpus.BloomFilter)
+    assert len(bloom) == 1000
+    assert bloom.max_length == 11
+    assert bloom.rank(sha1(b'password1')) is None
+    assert all(sha1(b'password%d' % i) in bloom for i in range(1000))
+    false_positives = sum(sha1(b'other%d' % i) in bloom for i in range(10000))
+    assert false_positives < 300
+
+
+def test_bloom_invalid(source, tmp_path):
+    with pytest.raises(ValueError):
+        corpus.build(source, str(tmp_path / 'corpus'), false_positive_rate=1)
+
+
+def test_load_invalid(source):
+    with pytest.raises(ValueError):
+        corpus.load(source)
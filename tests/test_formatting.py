@@ -1,9 +1,13 @@
-from passcheck.formatting import format_number, format_seconds
+import math
+
+from passcheck.formatting import format_brute_force, format_number, format_seconds, power_of_two
 
 
 def test_format_number():
     assert format_number(10**6) == '1,000,000'
     assert format_number(10**11) == '1.000000e+11'
+    assert format_number(1e11) == '1.000000e+11'
+    assert format_number(10**400) == '1.000000e+400'
 
 
 def test_format_seconds():
@@ -23,3 +27,15 @@ def test_format_seconds():
     assert format_seconds(60 * 60 * 24 * 365 * 1) == '1 year'
     assert format_seconds(60 * 60 * 24 * 365 * 10) == '10 years'
     assert format_seconds(60 * 60 * 24 * 365 * 100) == '100 years'
+
+
+def test_format_brute_force():
+    assert format_brute_force(60000, 1000) == '1 minute'
+    assert format_brute_force(10**400, 1e12) == '3.170979e+380 years'
+
+
+def test_power_of_two():
+    assert power_of_two(0) == 1
+    assert power_of_two(math.log2(11110)) == 11110
+    assert power_of_two(2000) == 2**2000
+    assert power_of_two(2000.5) >> 1948 == round(2**52.5)
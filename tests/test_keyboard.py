@@ -0,0 +1,49 @@
+import pytest
+
+from passcheck import keyboard
+
+
+def test_layout():
+    layout = keyboard.get_layout('qwerty')
+    assert layout is keyboard.get_layout('qwerty')
+    assert layout.size == 47
+    neighbours = {
+        b'q': b'12wa',
+        b's': b'wedxza',
+        b'1': b'`2q',
+        b'=': b'-[]',
+        b'/': b'.;\'',
+    }
+    for char, expected in neighbours.items():
+        key = layout.keys[char][0]
+        found = {c for c in layout.keys if layout.adjacency[key * layout.size + layout.keys[c][0]]}
+        assert {c for c in found if not layout.keys[c][1]} == {bytes([c]) for c in expected}
+    assert layout.keys[b'Q'] == (layout.keys[b'q'][0], True)
+    assert layout.keys[b'!'] == (layout.keys[b'1'][0], True)
+
+
+def test_layouts():
+    assert keyboard.get_layout('azerty').keys['é'.encode()] == keyboard.get_layout('azerty').keys[b'2'][:1] + (False,)
+    lt = keyboard.get_layout('lt')
+    assert lt.max_char_length == 3
+    assert lt.walk('ąčęė'.encode()) == (4, 1, 0)
+    with pytest.raises(ValueError):
+        keyboard.get_layout('dvorak')
+
+
+def test_walks():
+    layout = keyboard.get_layout('qwerty')
+    assert list(layout.walks(b'x1qaz2wsx')) == [[0, 1], [1, 2, 3, 4, 5], [5, 6, 7, 8, 9]]
+    assert list(layout.walks(b'qw\x00er')) == [[0, 1, 2], [3, 4, 5]]
+    assert list(layout.walks('ą'.encode())) == []
+    assert list(layout.walks(b'')) == []
+
+
+def test_walk():
+    layout = keyboard.get_layout('qwerty')
+    assert layout.walk(b'qwerty') == (6, 1, 0)
+    assert layout.walk(b'qwsa') == (4, 3, 0)
+    assert layout.walk(b'1qaz') == (4, 1, 0)
+    assert layout.walk(b'QweRTY') == (6, 1, 4)
+    assert layout.walk(b'qe') is None
+    assert layout.walk(b'q1') == (2, 1, 0)
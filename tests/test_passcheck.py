@@ -1,4 +1,13 @@
-from passcheck.passcheck import get_default_passcheck
+import math
+import string
+
+import pytest
+
+from itertools import combinations
+from unittest.mock import patch
+
+from passcheck.passcheck import PassCheck, Result, Value, get_default_passcheck
+from passcheck import patterns as pt
 
 
 def strorbytes(s):
@@ -35,3 +44,272 @@ def test_4():
 
 def test_5():
     assert check(b'\x19\xa8\x1d\xc4\xa3') == [b'\x19\xa8\x1d\xc4\xa3']
+
+
+words = {w.encode(): i for i, w in enumerate(['correct', 'horse', 'battery', 'staple', 'password', 'slaptažodis'], 1)}
+
+
+def get_words_passcheck():
+    patterns = get_default_passcheck().patterns
+    return PassCheck(patterns[:2] + [
+        pt.DictPattern('words', words),
+        pt.TitleCaseDictPattern('words (title)', words),
+        pt.CaseInsensitiveDictPattern('words (case-insensitive)', words),
+    ] + patterns[2:])
+
+
+def check_words(value):
+    results = get_words_passcheck().check(value)
+    return [strorbytes(r.value.bytes) for r in results]
+
+
+@pytest.mark.parametrize('value, expected', [
+    # Same compositions as the ones found by the old depth-first search.
+    ('123aaa', ['123', 'aaa']),
+    ('slaptažodis', ['slaptažodis']),
+    ('slaptažodis3', ['slaptažodis', '3']),
+    ('correct&horsebatterystaple', ['correct', '&', 'horse', 'battery', 'staple']),
+    ('Password123!', ['Password', '123', '!']),
+    ('passwordpassword', ['password', 'password']),
+    ('abcdefXYZ', ['abcdef', 'XYZ']),
+    ('x9x9x9x9', ['x', '9', 'x', '9', 'x', '9', 'x', '9']),
+    (b'\x19\xa8\x1d\xc4\xa3', [b'\x19\xa8\x1d\xc4\xa3']),
+    # The old search picked the fragment with the lowest entropy per byte at each position, which resulted in
+    # ['PaSsWoRd', '2000'] (25.66 bits) instead of the cheaper split below (20.45 bits).
+    ('PaSsWoRd2000', ['PaSsWoRd', '2', '000']),
+])
+def test_regression(value, expected):
+    assert check_words(value) == expected
+
+
+def test_scan():
+    passcheck = get_words_passcheck()
+    password = b'xHorsebattery&CORRECT'
+    found = passcheck.scan(password)
+    assert sorted(found) == [(1, 6), (3, 5), (6, 13), (14, 21)]
+    for i, j in combinations(range(len(password) + 1), 2):
+        expected = passcheck.get_result(password[i:j])
+        result = passcheck.get_result(password[i:j], found.get((i, j), passcheck.get_plan(j - i)))
+        assert (result.pattern.title, result.entropy) == (expected.pattern.title, expected.entropy)
+
+
+def test_default_passcheck_cached():
+    assert get_default_passcheck() is get_default_passcheck()
+
+
+def test_default_passcheck_missing_data():
+    titles = [p.title for p in get_default_passcheck().patterns]
+    for pattern in get_default_passcheck.__wrapped__().patterns:
+        assert pattern.available()
+    assert 'digits' in titles
+
+
+def test_check_many():
+    results = get_default_passcheck().check_many([b'123aaa', 'abc'])
+    assert [[strorbytes(r.value.bytes) for r in rs] for rs in results] == [['123', 'aaa'], ['abc']]
+
+
+def test_check_many_workers():
+    passcheck = get_words_passcheck()
+    passwords = ['123aaa', b'correct&horsebatterystaple', b'\x19\xa8\x1d\xc4\xa3', 'PaSsWoRd2000'] * 5
+    expected = [[(r.value.bytes, r.pattern.title) for r in rs] for rs in passcheck.check_many(passwords)]
+    results = passcheck.check_many(passwords, workers=2, chunksize=3)
+    assert [[(r.value.bytes, r.pattern.title) for r in rs] for rs in results] == expected
+
+
+@pytest.mark.parametrize('password', [
+    b'aaaa1111',
+    b'correct&horsebatterystaple',
+    b'Ab1!\xff\xff\xffxyz',
+    b'PaSsWoRd2000',
+    b'z' * 35,
+])
+def test_get_results(password):
+    passcheck = get_words_passcheck()
+    for i, j, result in passcheck.get_results(password):
+        expected = passcheck.get_result(password[i:j])
+        assert (result.value.bytes, result.pattern.title, result.entropy) == (
+            expected.value.bytes, expected.pattern.title, expected.entropy,
+        )
+
+
+def summary(results):
+    return [(r.value.bytes, r.pattern.title, r.entropy) for r in results]
+
+
+def test_cache():
+    passcheck = PassCheck(get_words_passcheck().patterns, cache_size=1000)
+    passwords = [b'correct&horse', b'horse&correct', b'PaSsWoRd2000']
+    expected = [summary(rs) for rs in get_words_passcheck().check_many(passwords)]
+    for _ in range(2):
+        assert [summary(rs) for rs in passcheck.check_many(passwords)] == expected
+    assert passcheck.cache.hits > passcheck.cache.misses > 0
+
+
+class Anything(pt.Pattern):
+
+    def matches(self, value):
+        return True
+
+    def combinations(self, value):
+        return 2
+
+
+class Digits(Anything):
+    min_length = 2
+    max_length = 10
+    alphabet = set(b'0123456789')
+
+
+def test_plan():
+    passcheck = PassCheck([Digits('123'), Anything('anything')])
+    passcheck.prepare()
+    assert [p.title for p in passcheck.get_plan(1)] == ['anything']
+    assert [p.title for p in passcheck.get_plan(10)] == ['123', 'anything']
+    assert [p.title for p in passcheck.get_plan(11)] == ['anything']
+    assert [p.title for p in passcheck.get_plan(1000)] == ['anything']
+    # Patterns without constraints are checked against any fragment.
+    assert summary(passcheck.check(b'\0\xff')) == [(b'\0\xff', 'anything', 1.0)]
+    assert summary(passcheck.check(b'12')) == [(b'12', '123', 1.0)]
+
+
+def test_plan_alphabet():
+    calls = []
+
+    class Text(Anything):
+        binary = False
+
+        def matches(self, value):
+            calls.append(value.bytes)
+            return True
+
+    passcheck = PassCheck([Text('text'), Digits('123')])
+    passcheck.check(b'1\0')
+    assert calls == [b'1']
+
+
+@pytest.mark.parametrize('password', [
+    b'correct&horsebatterystaple',
+    b'Ab1!\xff\xff\xffxyz',
+    b'PaSsWoRd2000',
+    b'aaaa1111',
+])
+def test_session(password):
+    passcheck = get_words_passcheck()
+    session = passcheck.session()
+    for j in range(1, len(password) + 1):
+        assert summary(session.append(password[j - 1])) == summary(passcheck.check(password[:j]))
+    for j in range(len(password) - 1, -1, -1):
+        assert summary(session.backspace()) == summary(passcheck.check(password[:j]))
+
+
+def test_session_append_text():
+    passcheck = get_words_passcheck()
+    session = passcheck.session()
+    session.append('correct&')
+    assert summary(session.append('horse')) == summary(passcheck.check('correct&horse'))
+    assert session.backspace(100) == ()
+
+
+@pytest.mark.parametrize('password', [
+    b'',
+    b'correct&horsebatterystaple',
+    b'Ab1!\xff\xff\xffxyz',
+    b'PaSsWoRd2000',
+    b'aaaa1111',
+    b'horse',
+    b'x7#Qz!9kLm@2',
+])
+def test_meets(password):
+    passcheck = get_words_passcheck()
+    entropy = sum(r.entropy for r in passcheck.check(password))
+    for min_bits in [0, 1, entropy / 2, entropy, entropy + 0.001, entropy * 2, 1000]:
+        assert passcheck.meets(password, min_bits) is (entropy >= min_bits)
+
+
+def test_meets_early_exit():
+    passcheck = get_words_passcheck()
+    with patch.object(passcheck, 'check', side_effect=AssertionError):
+        # Whole password is a single dictionary word.
+        assert passcheck.meets(b'horse', 20) is False
+        # No fragment can have less entropy than a random byte.
+        assert passcheck.meets(b'\x19\xa8\x1d\xc4\xa3', 30) is True
+
+
+@pytest.mark.parametrize('password', [
+    b'correct&horsebatterystaple',
+    b'Ab1!\xff\xff\xffxyz',
+    b'PaSsWoRd2000',
+])
+def test_max_span(password):
+    passcheck = get_words_passcheck()
+    windowed = PassCheck(passcheck.patterns, max_span=len(password))
+    assert summary(windowed.check(password)) == summary(passcheck.check(password))
+
+
+def test_max_span_auto():
+    passcheck = PassCheck(get_words_passcheck().patterns, max_span='auto')
+    passcheck.prepare()
+    assert passcheck.span == len(string.ascii_letters)
+
+
+def test_max_span_runs():
+    passcheck = PassCheck(get_words_passcheck().patterns, max_span=4)
+    assert [r.pattern.title for r in passcheck.check(b'a' * 1000)] == ['single lower case letter repeated']
+    password = b'x' + b'a' * 20 + b'bcd' + b'1' * 10
+    assert summary(passcheck.check(password)) == summary(get_words_passcheck().check(password))
+    session = passcheck.session()
+    for j in range(1, len(password) + 1):
+        assert summary(session.append(password[j - 1])) == summary(passcheck.check(password[:j]))
+
+
+def test_max_span_invalid():
+    with pytest.raises(ValueError):
+        PassCheck([], max_span=0)
+
+
+def test_value():
+    password = b'xabcx'
+    value = Value(password, 1, 4)
+    assert (len(value), value.bytes, value.unique_bytes_count) == (3, b'abc', 3)
+    assert Value(password).bytes is password
+    assert not hasattr(value, '__dict__')
+    result = Result(pt.SequencePatter('abc', 'abc'), value)
+    assert (result.entropy, result.combinations) == (math.log2(6), 6)
+    assert not hasattr(result, '__dict__')
+
+
+@pytest.mark.parametrize('max_span', [None, 5])
+def test_check_k_best(max_span):
+    passcheck = PassCheck(get_words_passcheck().patterns, max_span=max_span)
+    password = b'correct&horse2000'
+    compositions = passcheck.check(password, k=5)
+    assert len(compositions) == 5
+    assert summary(compositions[0]) == summary(passcheck.check(password))
+    costs = [sum(r.entropy + 1 for r in composition) for composition in compositions]
+    assert costs == sorted(costs)
+    assert len({tuple(len(r.value.bytes) for r in c) for c in compositions}) == 5
+    assert all(b''.join(r.value.bytes for r in c) == password for c in compositions)
+
+
+def test_check_k_best_invalid():
+    passcheck = get_words_passcheck()
+    with pytest.raises(ValueError, match='k must be at least 1'):
+        passcheck.check(b'abc', k=0)
+
+
+@pytest.mark.parametrize('cache_size', [0, 100])
+def test_check_batch(cache_size):
+    passcheck = PassCheck(get_words_passcheck().patterns, cache_size=cache_size)
+    passwords = [
+        'correct&horsebatterystaple', 'Password123!', '', 'x9x9x9x9', 'aaaa', b'\x19\xa8\x1d\xc4\xa3',
+        '123aaa', 'qwerty', 'p@ssw0rd', 'z' * 30,
+    ]
+    expected = [summary(get_words_passcheck().check(p)) for p in passwords]
+    assert [summary(results) for results in passcheck.check_batch(passwords)] == expected
+    # Longer passwords are checked one by one.
+    with patch('passcheck.vectorized.MAX_LENGTH', 10):
+        assert [summary(results) for results in passcheck.check_batch(passwords)] == expected
+    assert [summary(results) for results in passcheck.check_many(passwords, chunksize=3)] == expected
+    with patch('passcheck.vectorized.get_numpy', return_value=None):
+        assert [summary(results) for results in passcheck.check_batch(passwords)] == expected
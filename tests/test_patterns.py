@@ -1,12 +1,17 @@
+import math
 import os
 import string
 import tempfile
 
+import pytest
+
 from math import ceil
 from unittest.mock import patch, Mock
 
 from passcheck.passcheck import PassCheck, Value
+from passcheck import corpus
 from passcheck import patterns as pt
+from passcheck import wordlist
 
 
 digits = set(string.digits.encode())
@@ -103,4 +108,231 @@ def test_hunspell_installed_required(request):
     hunspell.HunSpell.return_value.get_dic_encoding = Mock(return_value='utf-8')
 
     with patch.object(pt.HunspellPattern, 'import_hunspell', return_value=hunspell):
-        assert pt.HunspellPattern('', f.name, 'apath', required=True).word_count == 42
+        pattern = pt.HunspellPattern('', f.name, 'apath', required=True)
+        assert pattern.word_count == 42
+        assert pattern.case_insensitive_count == 2**len('42')
+
+
+def test_compiled_dict(tmp_path):
+    source = tmp_path / 'words'
+    source.write_text('pass\npasswd\n')
+    words = wordlist.load(wordlist.compile(str(source)))
+    pattern = pt.CaseInsensitiveDictPattern('', words)
+    assert pattern.scanner is words
+    result = PassCheck([pattern]).get_result('PasS')
+    assert result.combinations == 2**len('pass') + 2**len('passwd')
+
+
+def test_dict_scanner():
+    words = [b'pass']
+    pattern = pt.DictPattern('', words)
+    assert pattern.scanner is pattern.scanner
+    assert pattern.scanner is not pt.DictPattern('', words).scanner
+    assert list(pattern.scanner.find(b'xpass')) == [(1, 5)]
+
+
+def test_dict_available(tmp_path):
+    assert pt.DictPattern('', [b'pass']).available()
+    assert not pt.DictPattern('', wordlist.LazyWordlist(str(tmp_path / 'missing'))).available()
+
+
+def test_hunspell_lazy():
+    hunspell = Mock()
+    with patch.object(pt.HunspellPattern, 'import_hunspell', return_value=hunspell):
+        pattern = pt.HunspellPattern('', 'dpath', 'apath', required=False)
+    assert not pattern.available()
+    assert pattern.matches(Value(b'abc')) is False
+    hunspell.HunSpell.assert_not_called()
+
+
+@pytest.mark.parametrize('k', [1, 2, 10, 16, 26, 52, 256])
+def test_geometric_sum(k):
+    for n in range(1, 40):
+        expected = sum(k**i for i in range(1, n + 1))
+        assert pt.geometric_sum(k, n) == expected
+        assert pt.geometric_sum_log2(k, n) == pytest.approx(math.log2(expected), rel=1e-12)
+
+
+def test_entropy_of_long_value():
+    pattern = pt.MultipleBytesPattern('', allbytes)
+    assert pattern.entropy(Value(b'\0' * 100000)) == pytest.approx(800000)
+
+
+def test_constraints():
+    sequence = pt.SequencePatter('', 'abc')
+    assert (sequence.min_length, sequence.max_length, sequence.alphabet) == (2, 3, set(b'abc'))
+    assert pt.DictPattern('', {b'pass': 1, b'password': 2}).max_length == 8
+    assert pt.MultipleBytesPattern('', digits).alphabet == digits
+    assert pt.SingleBytePattern('', digits).min_length == 2
+    # Patterns know nothing about values they can match, unless they say so.
+    pattern = pt.Pattern('')
+    assert (pattern.min_length, pattern.max_length, pattern.alphabet, pattern.binary) == (1, None, None, True)
+
+
+def test_compiled_dict_max_length(tmp_path):
+    source = tmp_path / 'words'
+    source.write_text('pass\npasswd\n')
+    assert pt.DictPattern('', wordlist.LazyWordlist(wordlist.compile(str(source)))).max_length == 6
+    assert pt.DictPattern('', wordlist.LazyWordlist(str(source))).max_length == 6
+
+
+@pytest.mark.parametrize('sequence', ['0123456789', 'abcabd', 'aaa'])
+def test_sequence_find(sequence):
+    pattern = pt.SequencePatter('', sequence)
+    text = b'x0123a9abcabdaaaab'
+    expected = [
+        (i, j) for i in range(len(text)) for j in range(i + 1, len(text) + 1) if pattern.matches(Value(text[i:j]))
+    ]
+    assert sorted(pattern.find(text)) == expected
+
+
+def test_min_entropy():
+    words = {b'pass': 1, b'password': 2, b'horse': 3}
+    checks = [
+        (pt.MultipleBytesPattern('', digits), b'123'),
+        (pt.SingleBytePattern('', digits), b'111'),
+        (pt.DictPattern('', words), b'horse'),
+        (pt.DictPattern('', words, ranked=True), b'pass'),
+        (pt.TitleCaseDictPattern('', words), b'Pass'),
+        (pt.CaseInsensitiveDictPattern('', words), b'PASS'),
+        (pt.CaseInsensitiveDictPattern('', words, ranked=True), b'PASS'),
+        (pt.SequencePatter('', string.digits), b'12'),
+        (pt.SequencePatter('', string.digits), b'89'),
+        (pt.KeyboardWalkPattern('', 'qwerty'), b'qwe'),
+        (pt.SubstitutionDictPattern('', words), b'h0rse'),
+        (pt.SubstitutionDictPattern('', words, ranked=True), b'p@ss'),
+        (pt.KeyboardWalkPattern('', 'lt'), 'ąčę'.encode()),
+    ]
+    for pattern, value in checks:
+        assert pattern.matches(Value(value))
+        assert pattern.min_entropy(len(value)) <= pattern.entropy(Value(value))
+
+
+@pytest.mark.parametrize('ranked', [False, True])
+def test_lexicon_patterns(tmp_path, ranked):
+    (tmp_path / 'one').write_text('pass\nword\nhorse\n')
+    (tmp_path / 'two').write_text('horse\nbattery\npass\n')
+    lexicon = wordlist.Lexicon([str(tmp_path / 'one'), str(tmp_path / 'two')])
+    variants = [
+        (pt.DictPattern, pt.LexiconPattern),
+        (pt.TitleCaseDictPattern, pt.TitleCaseLexiconPattern),
+        (pt.CaseInsensitiveDictPattern, pt.CaseInsensitiveLexiconPattern),
+    ]
+    for source in range(2):
+        words = wordlist.load(str(tmp_path / ['one', 'two'][source]))
+        for dict_pattern, lexicon_pattern in variants:
+            expected = dict_pattern('', words, ranked)
+            pattern = lexicon_pattern('', lexicon, source, ranked)
+            for v in [b'pass', b'Pass', b'PASS', b'pASS', b'battery', b'Horse', b'x', b'none']:
+                value = Value(v)
+                assert pattern.matches(value) == expected.matches(value)
+                if expected.matches(value):
+                    # Ranks of title case words are looked up in lower case.
+                    assert pattern.combinations(value) == expected.combinations(Value(v.lower()))
+                    assert pattern.min_entropy(len(v)) <= pattern.entropy(value)
+
+
+def test_lexicon_shared_lookup(tmp_path):
+    (tmp_path / 'one').write_text('pass\n')
+    lexicon = wordlist.Lexicon([str(tmp_path / 'one'), str(tmp_path / 'missing')])
+    assert dict(lexicon) == {b'pass': 0}
+    assert (lexicon.counts, lexicon.max_length) == ([1, 0], 4)
+    patterns = [pt.LexiconPattern('', lexicon, 0), pt.CaseInsensitiveLexiconPattern('', lexicon, 0)]
+    assert not pt.LexiconPattern('', lexicon, 1).available()
+    value = Value(b'pass')
+    with patch.object(lexicon, 'words', Mock(wraps=lexicon.words)) as words:
+        assert all(p.matches(value) for p in patterns)
+    assert words.index.call_count == 1
+
+
+def test_keyboard_walk():
+    pattern = pt.KeyboardWalkPattern('', 'qwerty')
+    for walk in [b'qwe', b'qwerty', b'1qaz', b'zaq1', b'!@#$', b'QweRTY', b'asdfgh', b'xsw2']:
+        assert pattern.matches(Value(walk))
+    for value in [b'qe', b'qw', b'qwr', b'aaa', b'qwe1', b'\xc4\x85\xc4\x8d\xc4\x99', b'qwertyuiop' * 5]:
+        assert not pattern.matches(Value(value))
+    assert pattern.combinations(Value(b'qwe')) == 2 * 216
+    assert pattern.combinations(Value(b'qwerty')) == 5 * 216
+    # Every character typed with shift doubles combinations.
+    assert pattern.combinations(Value(b'QWERTY')) == 2 * 5 * 216
+    # Turns and mixed case add combinations.
+    assert pattern.combinations(Value(b'qwsa')) > pattern.combinations(Value(b'qwer'))
+    assert pattern.combinations(Value(b'Qwer')) > pattern.combinations(Value(b'QWER'))
+    lt = pt.KeyboardWalkPattern('', 'lt')
+    assert lt.matches(Value('ąčęė'.encode()))
+    assert lt.combinations(Value('ąčęė'.encode())) == pattern.combinations(Value(b'1234'))
+
+
+@pytest.mark.parametrize('layout', ['qwerty', 'azerty', 'lt'])
+def test_keyboard_walk_find(layout):
+    pattern = pt.KeyboardWalkPattern('', layout)
+    text = 'x1qaz2wsxQwertyąčęėazer-zxcvbnm,;:!'.encode()
+    expected = [
+        (i, j) for i in range(len(text)) for j in range(i + 1, len(text) + 1) if pattern.matches(Value(text[i:j]))
+    ]
+    assert expected
+    assert sorted(pattern.find(text)) == expected
+
+
+def test_substitution_dict():
+    words = {b'password': 1, b'slaptazodis': 2, b'pill': 3, b'horse': 4}
+    pattern = pt.SubstitutionDictPattern('', words)
+    for value in [b'p@ssw0rd', b'P@ssw0rd', b's1aptazod1s', b'p1ll', b'pi11', b'h0r$e']:
+        assert pattern.matches(Value(value))
+    for value in [b'password', b'Password', b'p@SSw0rd', b'piii', b'x0rse', b'p@ss']:
+        assert not pattern.matches(Value(value))
+    assert pattern.combinations(Value(b'h0rse')) == 4 * 2
+    assert pattern.combinations(Value(b'p@ssw0rd')) == 4 * 2 * 2
+    assert pattern.combinations(Value(b'P@ssw0rd')) == 4 * 2 * 2 * 2
+    ranked = pt.SubstitutionDictPattern('', words, ranked=True)
+    assert ranked.combinations(Value(b'h0rse')) == 4 * 2
+    assert ranked.combinations(Value(b'p@ssw0rd')) == 1 * 2 * 2
+
+
+def test_substitution_dict_lexicon(tmp_path):
+    (tmp_path / 'one').write_text('password\nhorse\n')
+    (tmp_path / 'two').write_text('horse\nbattery\npassword\n')
+    lexicon = wordlist.Lexicon([str(tmp_path / 'one'), str(tmp_path / 'two')])
+    ranked = pt.SubstitutionDictPattern('', lexicon, ranked=True)
+    # Ranks are the lowest of ranks in each wordlist, not indexes of words in the lexicon.
+    assert ranked.combinations(Value(b'p4ssword')) == 1 * 2
+    assert ranked.combinations(Value(b'h0rse')) == 1 * 2
+    assert ranked.combinations(Value(b'b4ttery')) == 2 * 2
+    results = PassCheck([ranked]).check(b'p4ssword')
+    assert [(r.value.bytes, r.entropy) for r in results] == [(b'p4ssword', 1)]
+
+
+def test_substitution_dict_table():
+    words = {b'password': 1}
+    pattern = pt.SubstitutionDictPattern('', words, table={'@': 'a'})
+    assert pattern.matches(Value(b'p@ssword'))
+    assert not pattern.matches(Value(b'p@ssw0rd'))
+
+
+def test_substitution_dict_check():
+    words = {b'password': 1, b'horse': 2}
+    passcheck = PassCheck([
+        pt.SubstitutionDictPattern('substitutions', words),
+        pt.MultipleBytesPattern('sequence of bytes', set(range(256))),
+    ])
+    assert [(r.value.bytes, str(r.pattern)) for r in passcheck.check(b'p@ssw0rdh0rse')] == [
+        (b'p@ssw0rd', 'substitutions'),
+        (b'h0rse', 'substitutions'),
+    ]
+
+
+@pytest.mark.parametrize('ranked', [False, True])
+def test_breached_corpus(tmp_path, ranked):
+    source = tmp_path / 'passwords'
+    source.write_bytes(b'123456:50\npassword:70\nqwerty:10\n')
+    path = corpus.build(str(source), str(tmp_path / 'corpus'), ranked=ranked, counts=True)
+    pattern = pt.BreachedCorpusPattern('', path, ranked=True)
+    assert pattern.available()
+    assert pattern.max_length == 8
+    assert pattern.matches(Value(b'password'))
+    assert not pattern.matches(Value(b'Password'))
+    assert pattern.combinations(Value(b'password')) == (1 if ranked else 3)
+    assert pattern.combinations(Value(b'qwerty')) == 3
+    assert pattern.min_entropy(8) <= pattern.entropy(Value(b'password'))
+    assert pt.BreachedCorpusPattern('', path).combinations(Value(b'password')) == 3
+    assert not pt.BreachedCorpusPattern('', str(tmp_path / 'missing')).available()
@@ -0,0 +1,64 @@
+import string
+
+from passcheck import patterns as pt
+from passcheck.passcheck import PassCheck, Value
+from passcheck.profiling import PatternStats, ProfiledPattern, Stats
+
+
+digits = set(string.digits.encode())
+
+
+def test_profiled_pattern():
+    pattern = pt.DictPattern('words', [b'pass'])
+    stats = PatternStats(pattern)
+    profiled = ProfiledPattern(pattern, stats)
+    assert profiled.matches(Value(b'pass'))
+    assert not profiled.matches(Value(b'word'))
+    assert profiled.combinations(Value(b'pass')) == 1
+    assert str(profiled) == 'words'
+    assert profiled.words == [b'pass']
+    assert (stats.calls, stats.hits) == (2, 1)
+    assert stats.matches_time > 0
+    assert stats.combinations_time > 0
+
+
+def test_passcheck_profile():
+    patterns = [pt.SequencePatter('123', string.digits), pt.MultipleBytesPattern('digits', digits)]
+    passcheck = PassCheck(patterns, profile=True)
+    results = passcheck.check(b'1239')
+    assert [(r.value.bytes, str(r.pattern)) for r in results] == [(b'123', '123'), (b'9', 'digits')]
+    stats = passcheck.stats.as_dict()
+    assert (stats['passwords'], stats['fragments']) == (1, 10)
+    assert stats['scoring_time'] > 0
+    assert [(p['pattern'], p['calls'], p['hits']) for p in stats['patterns']] == [('123', 3, 3), ('digits', 0, 0)]
+
+
+def test_report():
+    stats = Stats([pt.Pattern('one')])
+    assert list(stats.report())[-1].split() == ['0', '0', '0.000', '0.000', 'one']
+
+
+def test_passcheck_no_profile():
+    passcheck = PassCheck([pt.MultipleBytesPattern('digits', digits)])
+    assert passcheck.stats is None
+    assert type(passcheck.patterns[0]) is pt.MultipleBytesPattern
+
+
+def test_passcheck_profile_workers():
+    patterns = [pt.SequencePatter('123', string.digits), pt.MultipleBytesPattern('digits', digits)]
+    passcheck = PassCheck(patterns, profile=True)
+    assert len(list(passcheck.check_many([b'1239'] * 10, workers=2, chunksize=3))) == 10
+    stats = passcheck.stats.as_dict()
+    assert (stats['passwords'], stats['fragments']) == (10, 100)
+    assert [(p['pattern'], p['calls'], p['hits']) for p in stats['patterns']] == [('123', 30, 30), ('digits', 0, 0)]
+
+
+def test_take():
+    stats = Stats([pt.Pattern('one')])
+    stats.passwords = 2
+    stats.patterns[0].matches_time = 0.5
+    taken = stats.take()
+    assert (stats.passwords, stats.patterns[0].matches_time) == (0, 0.0)
+    stats.add(taken)
+    stats.add(taken)
+    assert (stats.passwords, stats.patterns[0].matches_time) == (4, 1.0)
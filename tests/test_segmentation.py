@@ -0,0 +1,87 @@
+import pytest
+
+from passcheck import segmentation
+
+
+def test_best_empty():
+    assert segmentation.best({}, 0) == ()
+
+
+def test_best():
+    edges = {
+        0: [(1, 4, 'a'), (2, 10, 'ab'), (3, 9, 'abc')],
+        1: [(2, 4, 'b'), (3, 4, 'bc')],
+        2: [(3, 4, 'c')],
+    }
+    # a + bc costs 4 + 1 + 4 + 1 = 10, abc costs 9 + 1 = 10, the one found first wins.
+    assert segmentation.best(edges, 3) == ('abc',)
+
+
+def test_best_fewer_fragments():
+    edges = {
+        0: [(1, 1, 'a'), (2, 3, 'ab')],
+        1: [(2, 1, 'b')],
+    }
+    assert segmentation.best(edges, 2) == ('ab',)
+
+
+def test_best_long():
+    n = 5000
+    edges = {i: [(i + 1, 8, i)] for i in range(n)}
+    assert segmentation.best(edges, n) == tuple(range(n))
+
+
+def test_best_no_path():
+    with pytest.raises(ValueError):
+        segmentation.best({0: [(1, 1, 'a')]}, 2)
+
+
+def test_shortest():
+    edges = [
+        (0, 1, 4, 'a'), (0, 2, 10, 'ab'), (0, 3, 9, 'abc'),
+        (1, 2, 4, 'b'), (1, 3, 4, 'bc'),
+        (2, 3, 4, 'c'),
+    ]
+    assert segmentation.shortest(iter(edges), 3) == [(0, 3, 'abc')]
+    assert segmentation.shortest(iter(edges[:2] + edges[3:]), 3) == [(0, 1, 'a'), (1, 3, 'bc')]
+    assert segmentation.shortest(iter([]), 0) == []
+    with pytest.raises(ValueError):
+        segmentation.shortest(iter(edges[:1]), 2)
+
+
+def test_extend():
+    costs = [0]
+    back = [None]
+    segmentation.extend(costs, back, [(0, 4, 'a')])
+    segmentation.extend(costs, back, [(0, 8, 'ab'), (1, 3, 'b')])
+    assert costs == [0, 5, 9]
+    assert segmentation.backtrack(back) == [(0, 2, 'ab')]
+
+
+def test_k_best():
+    edges = [
+        (0, 1, 4, 'a'), (0, 2, 10, 'ab'), (0, 3, 9, 'abc'),
+        (1, 2, 4, 'b'), (1, 3, 4, 'bc'),
+        (2, 3, 4, 'c'),
+    ]
+    assert segmentation.k_best(iter(edges), 3, 10) == [
+        (10, [(0, 3, 'abc')]),
+        (10, [(0, 1, 'a'), (1, 3, 'bc')]),
+        (15, [(0, 1, 'a'), (1, 2, 'b'), (2, 3, 'c')]),
+        (16, [(0, 2, 'ab'), (2, 3, 'c')]),
+    ]
+    assert segmentation.k_best(iter(edges), 3, 1) == [(10, segmentation.shortest(iter(edges), 3))]
+    assert segmentation.k_best(iter([]), 0, 2) == [(0, [])]
+    with pytest.raises(ValueError):
+        segmentation.k_best(iter(edges[:1]), 2, 2)
+
+
+def test_k_best_all_paths():
+    # Every composition of n bytes is a path, with k large enough all 2**(n - 1) of them are found, in cost order.
+    n = 8
+    edges = [(i, j, (i * 7 + j * 3) % 5, (i, j)) for i in range(n) for j in range(i + 1, n + 1)]
+    paths = segmentation.k_best(iter(edges), n, 1000)
+    assert len(paths) == 2**(n - 1)
+    assert [c for c, _ in paths] == sorted(c for c, _ in paths)
+    for c, path in paths:
+        assert c == sum((i * 7 + j * 3) % 5 + 1 for i, j, _ in path)
@@ -0,0 +1,87 @@
+import asyncio
+import json
+import socket
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from passcheck import server
+from passcheck.passcheck import get_default_passcheck
+
+
+def run_until_cancelled(loop, task):
+    try:
+        loop.run_until_complete(task)
+    except asyncio.CancelledError:
+        pass
+
+
+@pytest.fixture
+def socket_path(tmp_path):
+    path = str(tmp_path / 'passcheck.sock')
+    started = threading.Event()
+    loop = asyncio.new_event_loop()
+
+    async def run():
+        with ThreadPoolExecutor(2) as executor:
+            srv = await server.start(get_default_passcheck(max_span='auto'), path, executor)
+            started.set()
+            async with srv:
+                await srv.serve_forever()
+
+    task = loop.create_task(run())
+    thread = threading.Thread(target=run_until_cancelled, args=(loop, task))
+    thread.start()
+    started.wait(5)
+    yield path
+    loop.call_soon_threadsafe(task.cancel)
+    thread.join(5)
+    loop.close()
+
+
+def test_request(socket_path):
+    assert server.request(socket_path, b'123aaa', timeout=5) == {
+        'entropy': 9.6073,
+        'bytes': 6,
+        'patterns': ['123... sequence', 'single lower case letter repeated'],
+    }
+    assert server.request(socket_path, b'\xff\xfe', timeout=5)['bytes'] == 2
+
+
+def test_request_invalid(socket_path):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(5)
+        sock.connect(socket_path)
+        sock.sendall(b'{"hex": "xyz"}\nnot json\n{"password": "abc"}\n')
+        with sock.makefile('rb') as f:
+            responses = [json.loads(f.readline()) for _ in range(3)]
+    assert [sorted(r) for r in responses] == [['error'], ['error'], ['bytes', 'entropy', 'patterns']]
+
+
+def test_request_too_long(socket_path):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(5)
+        sock.connect(socket_path)
+        try:
+            sock.sendall(b'{"password": "' + b'a' * server.LIMIT + b'"}\n')
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        with sock.makefile('rb') as f:
+            assert 'longer than' in json.loads(f.readline())['error']
+            assert f.readline() == b''
+
+
+def test_request_long_password(socket_path):
+    assert server.request(socket_path, b'q8z!' * (server.MAX_LENGTH // 4), timeout=5)['bytes'] == server.MAX_LENGTH
+    with pytest.raises(ValueError, match='longer than'):
+        server.request(socket_path, b'a' * (server.MAX_LENGTH + 1), timeout=5)
+    assert server.request(socket_path, b'abc', timeout=5)['bytes'] == 3
+
+
+def test_decode():
+    assert server.decode(b'{"password": "abc"}') == b'abc'
+    assert server.decode(b'{"hex": "616263"}') == b'abc'
+    with pytest.raises(KeyError):
+        server.decode(b'{}')
@@ -0,0 +1,35 @@
+from passcheck import substitutions
+
+
+def test_normalise():
+    subs = substitutions.Substitutions()
+    assert subs.normalise(b'p@ssw0rd') == subs.normalise(b'password')
+    # 1 substitutes both i and l, which share a normal form.
+    assert subs.normalise(b's1apta') == subs.normalise(b'slapta') == subs.normalise(b'siapta')
+    assert subs.normalise(b'xyz') == b'xyz'
+
+
+def test_table():
+    subs = substitutions.Substitutions({'4': 'a', '1': 'l'})
+    assert subs.normalise(b'4l1i') == b'alli'
+    assert subs.sources == {ord('4'), ord('1')}
+    assert subs.digest != substitutions.Substitutions().digest
+
+
+def test_substituted():
+    subs = substitutions.Substitutions()
+    assert subs.substituted(b'p@ssw0rd', b'password') == [(ord('@'), ord('a')), (ord('0'), ord('o'))]
+    assert subs.substituted(b'password', b'password') == []
+    assert subs.substituted(b'piii', b'pill') is None
+    assert subs.substituted(b'p1ll', b'pill') == [(ord('1'), ord('i'))]
+
+
+def test_variations():
+    subs = substitutions.Substitutions()
+    # All of a letter substituted.
+    assert subs.variations(b'p@ss', [(ord('@'), ord('a'))]) == 2
+    # One of two s substituted, either of them could be.
+    assert subs.variations(b'pa$s', [(ord('$'), ord('s'))]) == 2
+    # One of three e substituted.
+    assert subs.variations(b'3ee', [(ord('3'), ord('e'))]) == 3
+    assert subs.variations(b'p@$$', [(ord('@'), ord('a')), (ord('$'), ord('s'))]) == 4
@@ -0,0 +1,39 @@
+import math
+
+import pytest
+
+from passcheck import vectorized
+
+numpy = pytest.importorskip('numpy')
+
+
+def test_score_classes():
+    # Class 0 is digits, class 1 is any byte repeated, class 2 is any byte.
+    masks = [0b100] * 256
+    for byte in b'0123456789':
+        masks[byte] |= 0b1
+    for byte in range(256):
+        masks[byte] |= 0b10
+    entropies = {0: 3.0, 1: 1.0, 2: 8.0}
+
+    def entropy(k, length):
+        return math.inf if k == 1 and length < 2 else entropies[k] * length
+
+    [(e, k), (e2, k2)] = vectorized.score_classes([b'12a', b'aa'], 3, masks, 0b10, entropy)
+    # Only fragments within a password are scored.
+    assert [row[:3 - i] for i, row in enumerate(k.tolist())] == [[0, 0, 2], [0, 2], [2]]
+    assert e.tolist()[0] == [3.0, 6.0, 24.0]
+    assert [row[:2 - i] for i, row in enumerate(k2.tolist())] == [[2, 1], [2]]
+    assert e2.tolist()[0] == [8.0, 2.0]
+
+
+def test_score_classes_batches():
+    masks = [0b1] * 256
+    passwords = [b'x' * n for n in [5, 1, 3, 0, 4]]
+    with pytest.MonkeyPatch.context() as m:
+        m.setattr(vectorized, 'MAX_FRAGMENTS', 20)
+        scores = vectorized.score_classes(passwords, 1, masks, 0, lambda k, length: float(length))
+    for password, (e, k) in zip(passwords, scores):
+        n = len(password)
+        assert e.shape == k.shape == (n, n)
+        assert [row[:n - i] for i, row in enumerate(e.tolist())] == [list(range(1, n - i + 1)) for i in range(n)]
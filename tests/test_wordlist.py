@@ -2,6 +2,7 @@ import os
 import tempfile
 import pytest
 
+from passcheck import substitutions
 from passcheck import wordlist
 
 
@@ -27,3 +28,111 @@ def test_load_required_missing(request):
         pass
     with pytest.raises(FileNotFoundError):
         wordlist.load(f.name, required=True)
+
+
+def test_get_case_insensitive_combinations():
+    words = [b'pass', b'passwd', b'pass']
+    assert wordlist.get_case_insensitive_combinations(words) == (2**4 + 2**6 + 2**4, {})
+    assert wordlist.get_case_insensitive_combinations(words, ranked=True) == (2**4 + 2**6 + 2**4, {
+        b'pass': 2**4,
+        b'passwd': 2**4 + 2**6,
+    })
+
+
+def test_get_case_insensitive_combinations_cached(request):
+    with tempfile.NamedTemporaryFile(delete=False) as f:
+        f.write(b'one\ntwo\n')
+    request.addfinalizer(lambda: os.unlink(f.name))
+    words = wordlist.load(f.name)
+    assert wordlist.get_case_insensitive_combinations(words, ranked=True) == (16, {b'one': 8, b'two': 16})
+    assert wordlist.get_case_insensitive_combinations(words, ranked=True) == (16, {b'one': 8, b'two': 16})
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / 'words'
+    path.write_text('one\nTwo\nthree\nžirgas\ntwo\n')
+    return str(path)
+
+
+def test_compile(source):
+    words = wordlist.load(source)
+    assert isinstance(words, wordlist.Wordlist)
+    wordlist.compile(source)
+    compiled = wordlist.load(source)
+    assert isinstance(compiled, wordlist.CompiledWordlist)
+    assert dict(compiled) == words == {b'one': 1, b'two': 5, b'three': 3, 'žirgas'.encode(): 4}
+    assert list(compiled) == list(words)
+    assert compiled.max_length == 7
+    assert b'four' not in compiled
+    assert 'one' not in compiled
+    with pytest.raises(KeyError):
+        compiled[b'four']
+
+
+def test_compile_target(source, tmp_path):
+    target = wordlist.compile(source, str(tmp_path / 'words.pcwl'))
+    assert wordlist.load(target) == wordlist.load(source)
+
+
+def test_compile_outdated(source):
+    wordlist.compile(source)
+    with open(source, 'a') as f:
+        f.write('four\n')
+    assert isinstance(wordlist.load(source), wordlist.Wordlist)
+
+
+def test_compiled_find(source):
+    wordlist.compile(source)
+    compiled = wordlist.load(source)
+    assert sorted(compiled.find(b'xxONEthreeTWO')) == [(2, 5), (5, 10), (10, 13)]
+    assert list(compiled.find(b'')) == []
+
+
+def test_lazy(source):
+    words = wordlist.LazyWordlist(source)
+    assert words.words is None
+    assert b'one' in words
+    assert isinstance(words.words, wordlist.Wordlist)
+    assert sorted(words.find(b'xoneTWO')) == [(1, 4), (4, 7)]
+
+
+def test_get_normalised_index(source):
+    subs = substitutions.Substitutions()
+    words = wordlist.load(source)
+    index = {subs.normalise(w): (w,) for w in [b'one', b'two', b'three', 'žirgas'.encode()]}
+    assert wordlist.get_normalised_index(words, subs) == index
+    # Cached on disk.
+    assert wordlist.get_normalised_index(words, subs) == index
+    assert wordlist.get_normalised_index([b'lit', b'iit', b'mud', b'tii'], subs) == {b'iii': (b'lit', b'iit', b'tii')}
+    assert wordlist.get_normalised_index([b'lit', b'iit', b'mud', b'tii'], subs, ambiguity=2) == {
+        b'iii': (b'lit', b'iit'),
+    }
+
+
+def test_lexicon_compiled(tmp_path, monkeypatch):
+    (tmp_path / 'one').write_text('pass\nword\n')
+    (tmp_path / 'two').write_text('word\nhorse\n')
+    paths = [str(tmp_path / 'one'), str(tmp_path / 'two'), str(tmp_path / 'missing')]
+    lexicon = wordlist.Lexicon(paths)
+    assert isinstance(lexicon.load(), wordlist.CompiledLexicon)
+    assert list(lexicon) == [b'pass', b'word', b'horse']
+    assert [[ranks[lexicon[w]] for w in lexicon] for ranks in lexicon.ranks] == [[1, 2, 0], [0, 1, 2], [0, 0, 0]]
+    assert (lexicon.counts, lexicon.totals, lexicon.max_length) == ([2, 2, 0], [32, 48, 0], 5)
+    assert sorted(lexicon.find(b'xPassword')) == [(1, 5), (5, 9)]
+
+    # Compiled lexicon is reused, until a wordlist changes.
+    with monkeypatch.context() as m:
+        m.setattr(wordlist, 'write_lexicon', None)
+        assert wordlist.Lexicon(paths).load().path == lexicon.load().path
+    (tmp_path / 'missing').write_text('battery\n')
+    assert wordlist.Lexicon(paths).load().counts == [2, 2, 1]
+
+
+def test_lexicon_not_writable(tmp_path, monkeypatch):
+    (tmp_path / 'one').write_text('pass\n')
+    (tmp_path / 'file').write_text('')
+    monkeypatch.setenv('PASSCHECK_CACHE_DIR', str(tmp_path / 'file' / 'cache'))
+    words = wordlist.load_lexicon([str(tmp_path / 'one')])
+    assert words.path is None
+    assert dict(words) == {b'pass': 0}